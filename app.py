@@ -1,6 +1,7 @@
 import pandas as pd
 import random
 import streamlit as st
+from nucleotides import random_sequences
 
 # Load or create the dataset
 df = pd.DataFrame({
@@ -8,9 +9,9 @@ df = pd.DataFrame({
     'Genetic_Sequence': ['ATCGATCGGT', 'CGTACGATAC', 'GCTAGCTAGG', 'TGCATGCAAG', 'ACGTACGTAA']
 })
 
-# Function to generate random genetic sequences
+# Function to generate random genetic sequences (vectorized, whole sequence at once)
 def generate_sequence():
-    return ''.join(random.choices('ACGT', k=10))
+    return random_sequences(1, 10)[0]
 
 # Simulate hack (altering or deleting data)
 def simulate_hack(df):
@@ -1,40 +1,16 @@
 import streamlit as st
-import hashlib
-import base64
-import copy
 import random
-from datetime import datetime
+import time
 import pandas as pd
-
-# ==== Encryption / Decryption ====
-def encrypt_data(data_dict):
-    encoded = base64.b64encode(str(data_dict).encode("utf-8")).decode("utf-8")
-    return encoded
-
-def decrypt_data(encrypted_str):
-    try:
-        decoded = base64.b64decode(encrypted_str.encode("utf-8")).decode("utf-8")
-        return decoded
-    except Exception:
-        return "Decryption failed"
-
-# ==== Block Class ====
-class Block:
-    def __init__(self, index, timestamp, metadata, genetic_data, previous_hash):
-        self.index = index
-        self.timestamp = timestamp
-        self.metadata = metadata
-        self.genetic_data = encrypt_data(genetic_data)
-        self.previous_hash = previous_hash
-        self.hash = self.calculate_hash()
-
-    def calculate_hash(self):
-        block_content = f"{self.index}{self.timestamp}{self.metadata}{self.genetic_data}{self.previous_hash}"
-        return hashlib.sha256(block_content.encode()).hexdigest()
+from blockchain import build_chain, use_app_cipher
+from chain_view import render_chain_status
+from indexes import ChainIndex
+from ledger_store import LedgerStore
+from payload_cache import PayloadCache
+from tamper_store import TamperLog
 
 # ==== Create Blockchain ====
-def create_blockchain():
-    blockchain = []
+def create_blockchain(index=None):
     metadata_list = [
         {"Patient ID": "P001", "Test Date": "2023-08-01", "Sample Code": "S1"},
         {"Patient ID": "P002", "Test Date": "2023-08-02", "Sample Code": "S2"},
@@ -66,23 +42,39 @@ def create_blockchain():
         "Trait": "Alzheimer’s risk"
     }
     ]
-    prev_hash = "0"
-
-    for i in range(3):
-        block = Block(i, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), metadata_list[i], dna_list[i], prev_hash)
-        blockchain.append(block)
-        prev_hash = block.hash
-    return blockchain
+    return build_chain(zip(metadata_list, dna_list), index=index)
 
 # ==== Setup Chains ====
-original_chain = create_blockchain()
-server_1 = copy.deepcopy(original_chain)
-server_2 = copy.deepcopy(original_chain)
-server_3 = copy.deepcopy(original_chain)
-servers = {"Server 1": server_1, "Server 2": server_2, "Server 3": server_3}
+use_app_cipher()  # AES-GCM unless GENEBLOCK_CIPHER says otherwise
+
+# Built once per process and shared across sessions and reruns
+@st.cache_resource
+def get_ledger_store():
+    index = ChainIndex()
+    chain = create_blockchain(index)
+    return LedgerStore(lambda: chain, ["Server 1", "Server 2", "Server 3"], index)
+
+store = get_ledger_store()
+
+@st.cache_resource
+def get_tamper_log():
+    # Tagged with this app and this process's ledger (its genesis hash), so
+    # neither other apps' events nor a previous run's show up in the report
+    return TamperLog(ledger=f"app3.6:{store.block(0).hash[:16]}")
 
-if 'tamper_log' not in st.session_state:
-    st.session_state.tamper_log = []
+tamper_log = get_tamper_log()
+
+# Decrypted payloads, shared across sessions; entries live as long as the
+# admin session or generated access key they were decrypted under
+ADMIN_KEY_TTL = 15 * 60  # seconds
+
+@st.cache_resource
+def get_payload_cache():
+    cache = PayloadCache()
+    store.subscribe(cache.invalidate)
+    return cache
+
+payload_cache = get_payload_cache()
 
 # ==== UI Setup ====
 st.set_page_config(layout="wide")
@@ -97,85 +89,62 @@ col1, col2 = st.columns(2)
 with col1:
     server_to_edit = st.selectbox("Select Server:", ["Server 1", "Server 2", "Server 3"])
 with col2:
-    block_index = st.selectbox("Select Block Index to Edit:", [0, 1, 2])
+    block_index = st.number_input("Select Block Index to Edit:", min_value=0, max_value=len(store) - 1, value=0, step=1)
 
-target_block = servers[server_to_edit][block_index]
+target_block = store.block(block_index, server_to_edit)
 new_pid = st.text_input("New Patient ID", value=target_block.metadata["Patient ID"])
 new_sample = st.text_input("New Sample Code", value=target_block.metadata["Sample Code"])
 
 if st.button("⚠️Simulate Hack"):
-    target_block.metadata["Patient ID"] = new_pid
-    target_block.metadata["Sample Code"] = new_sample
-
-    # Update this and all subsequent hashes
-    chain = servers[server_to_edit]
-    for i in range(block_index, len(chain)):
-        prev_hash = chain[i-1].hash if i > 0 else "0"
-        chain[i].previous_hash = prev_hash
-        chain[i].hash = chain[i].calculate_hash()
-
-    st.session_state.tamper_log.append({
-        "Server": server_to_edit,
-        "Block": block_index,
-        "Time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Note": "Metadata manually tampered."
-    })
+    # Update this and all subsequent hashes (each rehashed block becomes private to this server)
+    edited = store.edit_metadata(server_to_edit, block_index, {"Patient ID": new_pid, "Sample Code": new_sample})
+
+    tamper_log.record(server_to_edit, block_index, "Metadata manually tampered.",
+                      ", ".join(edited.changed_fields(store.block(block_index))),
+                      flush=True)
     st.warning(f"⚠️ Block #{block_index} tampered on {server_to_edit}!")
 
+if st.button("♻️ Restore All Servers"):
+    store.restore()
+    st.success("✅ All servers restored from the canonical chain.")
+
 # ==== Consensus Checking ====
+# Frozen views of the shared store for the rest of this run
+original_chain, servers = store.snapshot()
+
 def majority_hashes(index):
-    hashes = [server[index].hash for server in servers.values()]
-    return max(set(hashes), key=hashes.count)
+    return store.majority_hash(index)
 
-def is_chain_valid(server_chain):
-    for i, block in enumerate(server_chain):
-        if block.hash != majority_hashes(i):
-            return False
-    return True
+def is_chain_valid(label):
+    return store.is_chain_valid(label)
 
 # ==== Display Chains with Consensus Status ====
 st.markdown("<h3 style='color:#333;'>🔗 Blockchain Status Across Servers</h3>", unsafe_allow_html=True)
 
-col1, col2, col3 = st.columns(3)
 server_colors = {
     "Server 1": "#E8F5E9",  # light green
     "Server 2": "#E3F2FD",  # light blue
     "Server 3": "#FFF3E0",  # light orange
 }
 
-for idx, (label, chain) in enumerate(servers.items()):
-    with [col1, col2, col3][idx]:
-        st.markdown(f"**{label}**")
-        for i, block in enumerate(chain):
-            # Check if this block is tampered compared to original
-            original_hash = original_chain[i].hash
-            if block.hash != original_hash:
-                bg_color = "#FFCDD2"  # red for tampered or affected block
-            else:
-                bg_color = server_colors[label]
-
-            st.markdown(f"""
-                <div style="
-                    background-color: {bg_color}; 
-                    padding: 17px; 
-                    border-radius: 5px; 
-                    margin-bottom: 15px;
-                    word-wrap: break-word;
-                    overflow-wrap: break-word;
-                    white-space: normal;
-                    font-size: 16px;">
-                    <strong>Block #{block.index}</strong><br>
-                    <strong>Timestamp:</strong> {block.timestamp}<br>
-                    <strong>Metadata:</strong> {block.metadata}<br>
-                    <strong>Prev Hash:</strong> {block.previous_hash}...<br>
-                    <strong>Hash:</strong> {block.hash}...
-                </div>
-            """, unsafe_allow_html=True)
+consensus_captions = {}
+for label, divergent_at in store.first_divergences().items():
+    if divergent_at is None:
+        consensus_captions[label] = "✅ In consensus with majority"
+    else:
+        consensus_captions[label] = f"❌ Diverges from majority at block #{divergent_at}"
+
+render_chain_status(servers, original_chain, server_colors, store.divergent_heights(), consensus_captions)
 
 # ==== View Tamper Log ====
+# Served from the durable store: filtered and paged in SQLite, newest first
+report_server = st.selectbox("Tamper report for:", ["All servers"] + list(servers))
 if st.button("📄View Tamper Report"):
-    if st.session_state.tamper_log:
-        st.dataframe(pd.DataFrame(st.session_state.tamper_log))
+    report_filter = None if report_server == "All servers" else report_server
+    total = tamper_log.count(server=report_filter)
+    if total:
+        st.caption(f"{total} tamper events recorded (showing the latest {min(total, 500)})")
+        st.dataframe(pd.DataFrame(tamper_log.query(server=report_filter, limit=500)))
     else:
         st.success("✅ No tampering recorded.")
         
@@ -185,16 +154,35 @@ admin_token = st.text_input("Enter Admin Password (Only for Admin)", type="passw
 
 # Show Admin buttons only if correct password entered
 if admin_token == "Pranjali123":
+    payload_cache.grant("admin", ADMIN_KEY_TTL)
     if st.button("🔓 Decrypt All Genetic Data (Admin Only)"):
-        for i, block in enumerate(original_chain):
-            decrypted = decrypt_data(block.genetic_data)
+        for i, decrypted in enumerate(payload_cache.decrypt_blocks(original_chain, "admin")):
+            st.success(f"🔍 Block #{i} - Decrypted DNA: {decrypted}")
+
+    # Indexed lookup: only the matching blocks are decrypted
+    lookup_col1, lookup_col2 = st.columns(2)
+    with lookup_col1:
+        lookup_field = st.selectbox("Find records by:", ["patient", "sample", "snp", "trait"],
+                                    format_func={"patient": "Patient ID", "sample": "Sample Code",
+                                                 "snp": "SNP_ID", "trait": "Trait"}.get)
+    with lookup_col2:
+        lookup_value = st.text_input("Value (e.g. P002 or rs429358)")
+    if st.button("🔎 Decrypt Matching Records") and lookup_value:
+        matches = store.lookup(lookup_field, lookup_value.strip())
+        if not matches:
+            st.info("No blocks match that value.")
+        for i, decrypted in zip(matches, payload_cache.decrypt_blocks([original_chain[i] for i in matches], "admin")):
             st.success(f"🔍 Block #{i} - Decrypted DNA: {decrypted}")
 
     if st.button("🔑 Generate Admin Access Key"):
         import uuid
+        if st.session_state.get("admin_key"):
+            payload_cache.revoke(st.session_state.admin_key)
         st.session_state.admin_key = str(uuid.uuid4())
+        payload_cache.grant(st.session_state.admin_key, ADMIN_KEY_TTL)
         with st.expander("📥 Admin Key (Copy & Share Securely)", expanded=False):
             st.code(st.session_state.admin_key, language='text')
+            st.caption(f"Valid until {time.strftime('%H:%M:%S', time.localtime(time.time() + ADMIN_KEY_TTL))}")
 else:
     if admin_token:
         st.error("❌ Invalid Admin Password!")
@@ -205,8 +193,15 @@ entered_key = st.text_input("🔐 Enter Secure Key Provided by Admin", type="pas
 
 if st.button("🔓 Decrypt Data via Secure Key"):
     if st.session_state.get("admin_key") and entered_key == st.session_state.admin_key:
-        for i, block in enumerate(original_chain):
-            decrypted = decrypt_data(block.genetic_data)
-            st.success(f"🔍 Block #{i} - Decrypted DNA: {decrypted}")
+        if payload_cache.is_active(entered_key):
+            for i, decrypted in enumerate(payload_cache.decrypt_blocks(original_chain, entered_key)):
+                st.success(f"🔍 Block #{i} - Decrypted DNA: {decrypted}")
+        else:
+            st.error("❌ This key has expired. Ask the Admin for a new one.")
     else:
         st.error("❌ Invalid or Missing Key. Contact Admin.")
+
+cache_stats = payload_cache.stats()
+if cache_stats["hits"] + cache_stats["misses"]:
+    st.caption(f"Decryption cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['entries']} records held")
@@ -1,68 +1,46 @@
 import streamlit as st
-import hashlib
-import base64
-import copy
 import pandas as pd
-from datetime import datetime
-
-# ========= Helper Functions ==========
-
-def encrypt_data(data):
-    return base64.b64encode(data.encode()).decode()
-
-def decrypt_data(encrypted_data):
-    try:
-        return base64.b64decode(encrypted_data.encode()).decode()
-    except Exception:
-        return "[Decryption Failed]"
-
-# ========= Block Definition ==========
-
-class Block:
-    def __init__(self, index, timestamp, metadata, genetic_data, previous_hash):
-        self.index = index
-        self.timestamp = timestamp
-        self.metadata = metadata
-        self.genetic_data = encrypt_data(genetic_data)
-        self.previous_hash = previous_hash
-        self.hash = self.calculate_hash()
-
-    def calculate_hash(self):
-        block_content = f"{self.index}{self.timestamp}{self.metadata}{self.genetic_data}{self.previous_hash}"
-        return hashlib.sha256(block_content.encode()).hexdigest()
+from blockchain import build_chain, use_app_cipher, decrypt_blocks
+from chain_view import render_chain_status
+from indexes import ChainIndex
+from ledger_store import LedgerStore
+from nucleotides import pack
+from tamper_store import TamperLog
 
 # ========= Create Blockchain ==========
 
-def create_blockchain():
-    blockchain = []
+def create_blockchain(index=None):
     metadata_list = [
         {"Patient ID": "P001", "Test Date": "2023-08-01", "Sample Code": "S1"},
         {"Patient ID": "P002", "Test Date": "2023-08-02", "Sample Code": "S2"},
         {"Patient ID": "P003", "Test Date": "2023-08-03", "Sample Code": "S3"}
     ]
-    dna_list = ["ATGCTACGATCG", "GGGCTAGCTTAC", "TACGGGCTAGCA"]
+    # Raw sequences are stored 2-bit packed (4 bases per byte) before encryption
+    dna_list = [pack(seq) for seq in ["ATGCTACGATCG", "GGGCTAGCTTAC", "TACGGGCTAGCA"]]
 
-    genesis_block = Block(0, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), metadata_list[0], dna_list[0], "0")
-    blockchain.append(genesis_block)
+    return build_chain(zip(metadata_list, dna_list), index=index)
 
-    for i in range(1, 3):
-        prev_hash = blockchain[i - 1].hash
-        new_block = Block(i, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), metadata_list[i], dna_list[i], prev_hash)
-        blockchain.append(new_block)
+# ========= Initialize Chains ==========
 
-    return blockchain
+use_app_cipher()  # AES-GCM unless GENEBLOCK_CIPHER says otherwise
 
-# ========= Initialize Chains ==========
+# Built once per process and shared across sessions and reruns
+@st.cache_resource
+def get_ledger_store():
+    index = ChainIndex()
+    chain = create_blockchain(index)
+    return LedgerStore(lambda: chain, ["Server 1", "Server 2", "Server 3"], index)
 
-original_chain = create_blockchain()
-server_1 = copy.deepcopy(original_chain)
-server_2 = copy.deepcopy(original_chain)
-server_3 = copy.deepcopy(original_chain)
-servers = {"Server 1": server_1, "Server 2": server_2, "Server 3": server_3}
+store = get_ledger_store()
 colors = {"Server 1": "#E8F5E9", "Server 2": "#E3F2FD", "Server 3": "#FFF3E0"}
 
-if 'tamper_log' not in st.session_state:
-    st.session_state.tamper_log = []
+@st.cache_resource
+def get_tamper_log():
+    # Tagged with this app and this process's ledger (its genesis hash), so
+    # neither other apps' events nor a previous run's show up in the report
+    return TamperLog(ledger=f"app3:{store.block(0).hash[:16]}")
+
+tamper_log = get_tamper_log()
 
 # ========= Streamlit UI ==========
 
@@ -79,7 +57,7 @@ with colA:
 with colB:
     block_index = st.selectbox("Choose Block to Edit (Index):", [0, 1, 2])
 
-block_to_edit = servers[server_selected][block_index]
+block_to_edit = store.block(block_index, server_selected)
 
 # Editable metadata fields
 new_patient_id = st.text_input("Edit Patient ID", value=block_to_edit.metadata["Patient ID"])
@@ -87,55 +65,34 @@ new_sample_code = st.text_input("Edit Sample Code", value=block_to_edit.metadata
 
 # Button to apply changes
 if st.button("Apply Changes to Metadata"):
-    # Step 1: Edit metadata
-    block_to_edit.metadata["Patient ID"] = new_patient_id
-    block_to_edit.metadata["Sample Code"] = new_sample_code
-    block_to_edit.hash = block_to_edit.calculate_hash()
-
-    # Step 2: Propagate changes forward
-    chain = servers[server_selected]
-    for i in range(block_index + 1, len(chain)):
-        chain[i].previous_hash = chain[i - 1].hash
-        chain[i].hash = chain[i].calculate_hash()
+    # Step 1 + 2: Edit metadata on a private copy of the block and propagate changes forward
+    block_to_edit = store.edit_metadata(server_selected, block_index, {
+        "Patient ID": new_patient_id,
+        "Sample Code": new_sample_code
+    })
 
     # Step 3: Log tampering if detected
-    if block_to_edit.hash != original_chain[block_index].hash:
-        st.session_state.tamper_log.append({
-            "Server": server_selected,
-            "Block": block_index,
-            "Time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Note": "Metadata manually tampered."
-        })
+    original_block = store.block(block_index)
+    if block_to_edit.hash != original_block.hash:
+        tamper_log.record(server_selected, block_index, "Metadata manually tampered.",
+                          ", ".join(block_to_edit.changed_fields(original_block)),
+                          flush=True)
         st.error(f"⚠️ Block #{block_index} on {server_selected} tampered manually!")
 
+if st.button("♻️ Restore All Servers"):
+    store.restore()
+    st.success("✅ All servers restored from the canonical chain.")
+
 # ========== Display Blockchain Chains ==========
 st.subheader("🔗 Blockchain Status Across Servers")
-col1, col2, col3 = st.columns(3)
-servers = {"Server 1": server_1, "Server 2": server_2, "Server 3": server_3}
-colors = {"Server 1": "#E8F5E9", "Server 2": "#E3F2FD", "Server 3": "#FFF3E0"}
-
-for idx, (label, chain) in enumerate(servers.items()):
-    with [col1, col2, col3][idx]:
-        st.markdown(f"**{label}**")
-        for i, block in enumerate(chain):
-            original_hash = original_chain[i].hash
-            bg_color = "#FFCDD2" if block.hash != original_hash else colors[label]
-            st.markdown(f"""
-                <div style="background-color: {bg_color}; padding: 10px; border-radius: 5px; margin-bottom: 10px;
-                            font-family: monospace; max-width: 100%; word-wrap: break-word; overflow-wrap: break-word;">
-                    <strong>Block #{block.index}</strong><br>
-                    <strong>Timestamp:</strong> {block.timestamp}<br>
-                    <strong>Metadata:</strong> {block.metadata}<br>
-                    <strong>Prev Hash:</strong> <span style="word-break: break-all;">{block.previous_hash}</span><br>
-                    <strong>Hash:</strong> <span style="word-break: break-all;">{block.hash}</span>
-                </div>
-            """, unsafe_allow_html=True)
+original_chain, servers = store.snapshot()
+render_chain_status(servers, original_chain, colors, store.divergent_heights())
 
 # ========= Tamper Report ==========
 
 if st.button("📑 View Tamper Report"):
-    if st.session_state.tamper_log:
-        df = pd.DataFrame(st.session_state.tamper_log)
+    if tamper_log.count():
+        df = pd.DataFrame(tamper_log.query(limit=500))
         st.warning("🚨 Tampering Activity Detected:")
         st.dataframe(df)
     else:
@@ -147,8 +104,7 @@ st.subheader("🔐 Admin Decryption Panel")
 token = st.text_input("Enter Admin Token to Decrypt DNA", type="password")
 if st.button("🔓 Decrypt All Genetic Data"):
     if token == "Pranjali123":
-        for i, block in enumerate(original_chain):
-            decrypted = decrypt_data(block.genetic_data)
+        for i, decrypted in enumerate(decrypt_blocks(original_chain)):
             st.success(f"Decrypted Block #{i} DNA: {decrypted}")
     else:
         st.error("❌ Invalid admin token!")
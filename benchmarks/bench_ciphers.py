@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ciphers import BACKENDS, decrypt_many, encrypt_many, generate_key, get_cipher
+
+# ==== Cipher Throughput Benchmark ====
+# Serial vs batched (thread pool) encrypt/decrypt for every backend, on
+# records shaped like the app's SNP payloads (or larger, via payload size).
+#   python benchmarks/bench_ciphers.py [count] [payload size] [workers]
+# The batch path only uses threads with two or more workers (default: one
+# per core), so on a single core both rows measure the same loop.
+
+
+def make_records(count, payload_size):
+    record = str({
+        "Patient ID": "P002",
+        "SNP_ID": "rs3365478",
+        "Chromosome": "5",
+        "Position": "148206337",
+        "Genotype": "Arg16Gly",
+        "Trait": "Asthma risk",
+    })
+    record = (record * (payload_size // len(record) + 1))[:payload_size]
+    return [record] * count
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(count=20000, payload_size=200, workers=None):
+    workers = workers or os.cpu_count() or 1
+    records = make_records(count, payload_size)
+    megabytes = count * payload_size / 1e6
+    print(f"{count} records x {payload_size} bytes, {workers} workers")
+    for name in BACKENDS:
+        try:
+            cipher = get_cipher(name, generate_key())
+        except ImportError:
+            print(f"{name:<18} skipped (install 'cryptography')")
+            continue
+        tokens, serial_enc = timed(lambda: [cipher.encrypt(r) for r in records])
+        _, serial_dec = timed(lambda: [cipher.decrypt(t) for t in tokens])
+        tokens, batch_enc = timed(lambda: encrypt_many(cipher, records, workers))
+        plain, batch_dec = timed(lambda: decrypt_many(cipher, tokens, workers))
+        assert plain == records
+        for label, seconds in [("encrypt serial", serial_enc), ("decrypt serial", serial_dec),
+                               ("encrypt batch", batch_enc), ("decrypt batch", batch_dec)]:
+            print(f"{name:<18} {label:<15} {count / seconds:>12,.0f} records/s  {megabytes / seconds:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block
+
+# ==== Hashing Micro-Benchmark ====
+# Compares the old f-string block hash with the canonical binary encoding,
+# both cold (caches dropped, as after an edit) and warm (only previous_hash
+# changes, as in the forward rehash after a tamper).
+
+METADATA = {"Patient ID": "P002", "Test Date": "2023-08-02", "Sample Code": "S2"}
+GENETIC = {
+    "Patient ID": "P002",
+    "SNP_ID": "rs3365478",
+    "Chromosome": "5",
+    "Position": "148206337",
+    "Genotype": "Arg16Gly",
+    "Trait": "Asthma risk",
+}
+
+
+def fstring_hash(block):
+    block_content = f"{block.index}{block.timestamp}{block.metadata}{block.genetic_data}{block.previous_hash}"
+    return hashlib.sha256(block_content.encode()).hexdigest()
+
+def rate(fn, rounds):
+    start = time.perf_counter()
+    for i in range(rounds):
+        fn(i)
+    return rounds / (time.perf_counter() - start)
+
+
+def main(rounds=100000):
+    block = Block(1, "2023-08-02 10:00:00", METADATA, GENETIC, "0")
+    prev = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(256)]
+
+    def legacy(i):
+        block.previous_hash = prev[i & 255]
+        fstring_hash(block)
+
+    def canonical_cold(i):
+        block.previous_hash = prev[i & 255]
+        block._invalidate()
+        block.calculate_hash()
+
+    def canonical_warm(i):
+        block.previous_hash = prev[i & 255]
+        block.calculate_hash()
+
+    results = {
+        "f-string": rate(legacy, rounds),
+        "canonical (cold)": rate(canonical_cold, rounds // 10),
+        "canonical (warm)": rate(canonical_warm, rounds),
+    }
+    base = results["f-string"]
+    for name, value in results.items():
+        print(f"{name:<18} {value:>12,.0f} hashes/s  ({value / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,49 @@
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import encrypt_data
+from nucleotides import pack, random_packed, random_sequences, unpack
+
+# ==== Packed Nucleotide Benchmark ====
+# Text vs 2-bit packed sequences at several read lengths: bytes handed to
+# the cipher and to SHA-256, pack/unpack cost, and random generation with
+# random.choices vs the vectorized generators.
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(count=2000, lengths=(150, 10000, 1000000)):
+    import random
+    for length in lengths:
+        reads = max(1, count * 150 // length)
+        texts, text_gen = timed(lambda: ["".join(random.choices("ACGT", k=length)) for _ in range(reads)])
+        _, vector_gen = timed(lambda: random_sequences(reads, length))
+        _, packed_gen = timed(lambda: random_packed(reads, length))
+        packed, pack_time = timed(lambda: [pack(text) for text in texts])
+        _, unpack_time = timed(lambda: [unpack(seq) for seq in packed])
+        payloads = [seq.to_bytes() for seq in packed]
+        _, text_hash = timed(lambda: [hashlib.sha256(text.encode()).digest() for text in texts])
+        _, packed_hash = timed(lambda: [hashlib.sha256(payload).digest() for payload in payloads])
+        _, text_seal = timed(lambda: [encrypt_data(text) for text in texts])
+        _, packed_seal = timed(lambda: [encrypt_data(seq) for seq in packed])
+
+        text_bytes = sum(len(text) for text in texts)
+        packed_bytes = sum(len(payload) for payload in payloads)
+        print(f"{reads} reads x {length} bases")
+        print(f"  payload bytes      text {text_bytes:>12,}  packed {packed_bytes:>12,}  ({text_bytes / packed_bytes:.2f}x smaller)")
+        print(f"  generate           random.choices {text_gen:.4f}s  vectorized {vector_gen:.4f}s  packed {packed_gen:.4f}s")
+        print(f"  pack / unpack      {pack_time:.4f}s / {unpack_time:.4f}s")
+        print(f"  sha256             text {text_hash:.4f}s  packed {packed_hash:.4f}s")
+        print(f"  encrypt            text {text_seal:.4f}s  packed {packed_seal:.4f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
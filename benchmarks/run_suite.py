@@ -0,0 +1,206 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import build_chain, get_cipher
+from ledger_store import LedgerStore
+from replica import make_replicas
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==== Ledger Hot-Path Benchmark Suite ====
+# Headless (no Streamlit) timings of the paths the apps exercise, over a grid
+# of chain length x replica count x payload size:
+#
+#   create_blockchain     building and hashing every block
+#   calculate_hash_cold   rehash with cached encodings dropped (as after an edit)
+#   calculate_hash_warm   rehash with cached encodings kept
+#   replica_setup_cow     make_replicas (copy-on-write views)
+#   replica_setup_deepcopy  the old copy.deepcopy per server, for comparison
+#   ledger_store_setup    LedgerStore: replicas, verifier, index, checkpoints
+#   forward_rehash        edit at height 0 on one server, rehashing the rest
+#   majority_hashes       majority hash of every height
+#   is_chain_valid_full   every server verified from scratch
+#   is_chain_valid_incremental  the same after a single edit at the tip
+#   consensus_matrix      vectorized DigestMatrix consensus (needs numpy)
+#
+# Every configuration runs in its own child process so peak RSS is not
+# inherited from a bigger run. Output is one JSON document.
+
+DEFAULT_LENGTHS = [1000, 10000, 100000, 1000000]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def make_records(length, payload_size, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(length):
+        metadata = {"Patient ID": f"P{i:07d}", "Test Date": "2023-08-01", "Sample Code": f"S{i}"}
+        genetic = {
+            "Patient ID": metadata["Patient ID"],
+            "SNP_ID": f"rs{1000 + i}",
+            "Chromosome": str(i % 22 + 1),
+            "Position": str(10000 + i),
+            "Genotype": "A/G",
+            "Trait": "Simulated",
+            "Sequence": "".join(rng.choices("ACGT", k=payload_size)),
+        }
+        records.append((metadata, genetic))
+    return records
+
+
+class Phases:
+    def __init__(self):
+        self.results = {}
+
+    def run(self, name, ops, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        self.results[name] = {
+            "seconds": round(seconds, 6),
+            "ops": ops,
+            "ops_per_second": round(ops / seconds, 1) if seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        return result
+
+    def skip(self, name, reason):
+        self.results[name] = {"skipped": reason}
+
+
+def run_config(length, replicas, payload_size, deepcopy_limit=100000, seed=0):
+    labels = [f"Server {n}" for n in range(1, replicas + 1)]
+    records = make_records(length, payload_size, seed)
+    phases = Phases()
+    baseline_rss = peak_rss_mb()
+
+    # Passed as arguments rather than captured, so `del` really frees them
+    chain = phases.run("create_blockchain", length, build_chain, records, "2023-08-01 00:00:00")
+    del records
+
+    def rehash_cold():
+        for block in chain:
+            block._invalidate()
+            block.calculate_hash()
+
+    phases.run("calculate_hash_cold", length, rehash_cold)
+    phases.run("calculate_hash_warm", length, lambda: [block.calculate_hash() for block in chain])
+    phases.run("replica_setup_cow", length * replicas, lambda: make_replicas(chain, labels))
+    if length <= deepcopy_limit:
+        phases.run("replica_setup_deepcopy", length * replicas,
+                   lambda: {label: copy.deepcopy(chain) for label in labels})
+    else:
+        phases.skip("replica_setup_deepcopy", f"length > deepcopy limit {deepcopy_limit}")
+
+    store = phases.run("ledger_store_setup", length * replicas, lambda: LedgerStore(lambda: chain, labels))
+    verifier = store.verifier
+    phases.run("forward_rehash", length,
+               lambda: store.edit_metadata(labels[-1], 0, {"Patient ID": "HACKED"}))
+    phases.run("majority_hashes", length, lambda: [verifier.majority_hash(i) for i in range(length)])
+
+    def verify_all():
+        verifier.invalidate(0)
+        return [verifier.is_chain_valid(label) for label in labels]
+
+    valid = phases.run("is_chain_valid_full", length * replicas, verify_all)
+    store.edit_metadata(labels[0], length - 1, {"Sample Code": "HACKED"})
+    phases.run("is_chain_valid_incremental", replicas,
+               lambda: [verifier.is_chain_valid(label) for label in labels])
+
+    try:
+        from consensus import DigestMatrix
+    except ImportError:
+        phases.skip("consensus_matrix", "numpy not installed")
+    else:
+        phases.run("consensus_matrix", length * replicas,
+                   lambda: DigestMatrix.from_servers(store.servers).consensus())
+
+    return {
+        "length": length,
+        "replicas": replicas,
+        "payload_size": payload_size,
+        "valid_after_tamper": dict(zip(labels, valid)),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": phases.results,
+    }
+
+
+def run_isolated(length, replicas, payload_size, deepcopy_limit, seed):
+    command = [sys.executable, os.path.abspath(__file__), "--single",
+               "--lengths", str(length), "--replicas", str(replicas), "--payloads", str(payload_size),
+               "--deepcopy-limit", str(deepcopy_limit), "--seed", str(seed)]
+    child = subprocess.run(command, capture_output=True, text=True)
+    if child.returncode != 0:
+        return {"length": length, "replicas": replicas, "payload_size": payload_size,
+                "error": (child.stderr.strip().splitlines() or [f"exit code {child.returncode}"])[-1]}
+    return json.loads(child.stdout)
+
+
+def int_list(value):
+    return [int(float(part)) for part in value.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ledger hot paths and print JSON.")
+    parser.add_argument("--lengths", type=int_list, default=DEFAULT_LENGTHS,
+                        help="comma-separated chain lengths (default 1e3,1e4,1e5,1e6)")
+    parser.add_argument("--replicas", type=int_list, default=[3], help="comma-separated replica counts")
+    parser.add_argument("--payloads", type=int_list, default=[64],
+                        help="comma-separated DNA payload sizes in bases")
+    parser.add_argument("--deepcopy-limit", type=int, default=100000,
+                        help="skip the deepcopy baseline above this chain length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single:
+        result = run_config(args.lengths[0], args.replicas[0], args.payloads[0], args.deepcopy_limit, args.seed)
+        json.dump(result, sys.stdout)
+        return
+
+    report = {
+        "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cipher": get_cipher().name,
+        "runs": [],
+    }
+    for length in args.lengths:
+        for replicas in args.replicas:
+            for payload_size in args.payloads:
+                print(f"length={length} replicas={replicas} payload={payload_size}", file=sys.stderr)
+                report["runs"].append(run_isolated(length, replicas, payload_size, args.deepcopy_limit, args.seed))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+import base64
+import binascii
+import copy
+import hashlib
+import os
+import sys
+from array import array
+from datetime import datetime
+from types import MappingProxyType
+
+from ciphers import cipher_from_env, decrypt_many
+
+from merkle import diff_leaves, inclusion_proof, leaf_hash, merkle_root, verify_proof
+from serialization import (DIGEST_SIZE, GENESIS_PREV_HASH, PACKED_SEQUENCE_MAGIC, decode_digest, decode_fields,
+                           encode_digest, encode_fields, encode_header, encode_raw_header, pack_bytes, pack_str,
+                           unpack_bytes)
+
+# ==== Encryption / Decryption ====
+# Routed through the configured cipher backend (see ciphers.py); the default
+# is the original base64 "plaintext-debug" encoding. A raw sequence payload
+# given as a nucleotides.PackedSequence is sealed in its 2-bit packed form and
+# comes back out of decryption as the sequence text.
+_cipher = None
+
+def get_cipher():
+    global _cipher
+    if _cipher is None:
+        _cipher = cipher_from_env()
+    return _cipher
+
+def set_cipher(cipher):
+    global _cipher
+    _cipher = cipher
+
+def use_app_cipher():
+    # The apps' ledgers live in memory, so they default to AES-GCM under a
+    # random per-process key when GENEBLOCK_CIPHER / GENEBLOCK_KEY are unset.
+    # Only the first call in a process picks the cipher.
+    global _cipher
+    if _cipher is None:
+        _cipher = cipher_from_env(default="aes-gcm", ephemeral_key=True)
+    return _cipher
+
+def _packed_sequence_type():
+    # numpy only loads once something has imported nucleotides; until then
+    # no payload can be a PackedSequence
+    module = sys.modules.get("nucleotides")
+    return module.PackedSequence if module is not None else ()
+
+def _plaintext(data):
+    return data.to_bytes() if isinstance(data, _packed_sequence_type()) else data
+
+def _as_text(raw):
+    if raw.startswith(PACKED_SEQUENCE_MAGIC):
+        from nucleotides import PackedSequence, unpack
+        return unpack(PackedSequence.from_bytes(raw))
+    return raw.decode("utf-8")
+
+def encrypt_data(data):
+    return get_cipher().encrypt(_plaintext(data))
+
+def decrypt_data(encrypted_data):
+    try:
+        return _as_text(get_cipher().decrypt_raw(encrypted_data))
+    except Exception:
+        return "[Decryption Failed]"
+
+def decrypt_blocks(blocks, workers=None):
+    # Batched, multi-threaded decrypt of many blocks' genetic data
+    failed = "[Decryption Failed]"
+    texts = []
+    for raw in decrypt_many(get_cipher(), [block.genetic_data for block in blocks], workers, failed=None, raw=True):
+        try:
+            texts.append(_as_text(raw) if raw is not None else failed)
+        except Exception:
+            texts.append(failed)
+    return texts
+
+# ==== Field Commitments ====
+# Every genetic field gets its own salted leaf hash, computed while the
+# plaintext is at hand. The salt travels encrypted, so the leaves can be
+# compared between replicas without decrypting anything, but not brute-forced.
+def genetic_fields(genetic_data):
+    if isinstance(genetic_data, dict):
+        return genetic_data
+    return {"sequence": _plaintext(genetic_data)}
+
+def seal_genetic_data(genetic_data, salt=None):
+    salt = salt if salt is not None else os.urandom(16)
+    field_hashes = {
+        name: leaf_hash("genetic:" + name, value, salt).hex()
+        for name, value in sorted(genetic_fields(genetic_data).items())
+    }
+    return encrypt_data(genetic_data), field_hashes, encrypt_data(salt.hex())
+
+# ==== Block Class ====
+# Blocks are compact: __slots__ instead of an instance dict, the block hash,
+# previous hash and Merkle root held as raw 32-byte digests, metadata as a
+# tuple of values under a key tuple shared by every block with the same
+# fields, and the per-field genetic leaves packed into one bytes object. The
+# hex strings `hash` / `previous_hash` and the `metadata` / `field_hashes`
+# mappings are built on access, for display and the existing callers. The
+# sealed genetic data and salt are cipher tokens (base64 text); blocks hold the
+# raw bytes they encode, a quarter smaller and without a str header, and
+# `genetic_data` / `field_salt` give the token text back on access. Hashing
+# and the canonical encoding take the token's ASCII bytes straight from the
+# base64 encoder instead of building that text.
+#
+# Whole chains are kept in a BlockTable (below), which hands blocks out on
+# access.
+#
+# The Merkle root is cached and only rebuilt after update_metadata() /
+# set_genetic_data(), so rehashing forward after an edit only re-encodes the
+# small header with the new previous digest.
+_shared_keys = {}
+
+def _share(keys):
+    return _shared_keys.setdefault(keys, keys)
+
+def _token_bytes(token):
+    # Anything that isn't canonical base64 (e.g. a hand-made stored token) is kept as given
+    try:
+        raw = base64.b64decode(token, validate=True)
+    except (binascii.Error, ValueError, TypeError):
+        return token
+    return raw if base64.b64encode(raw).decode("ascii") == token else token
+
+def _token_text(value):
+    return base64.b64encode(value).decode("ascii") if isinstance(value, bytes) else value
+
+def _token_ascii(value):
+    # The token as hashed and encoded: ASCII bytes, or a non-canonical token's text
+    return base64.b64encode(value) if isinstance(value, bytes) else value
+
+
+class Block:
+    __slots__ = ("index", "timestamp", "_metadata_keys", "_metadata_values", "_sealed",
+                 "_field_names", "_field_digests", "_sealed_salt", "previous_digest", "digest", "_root")
+
+    def __init__(self, index, timestamp, metadata, genetic_data, previous_hash):
+        self.index = index
+        self.timestamp = sys.intern(timestamp) if isinstance(timestamp, str) else timestamp
+        self.metadata = metadata  # Non-sensitive metadata only
+        # Sensitive info encrypted
+        self.genetic_data, self.field_hashes, self.field_salt = seal_genetic_data(genetic_data)
+        self.previous_hash = previous_hash
+        self.digest = self.calculate_digest()
+
+    def __copy__(self):
+        # Every slot is immutable, so a shallow copy is a fully independent block
+        block = Block.__new__(Block)
+        for name in Block.__slots__:
+            setattr(block, name, getattr(self, name))
+        return block
+
+    # ---- Hex / mapping views ----
+    @property
+    def hash(self):
+        return self.digest.hex()
+
+    @hash.setter
+    def hash(self, value):
+        self.digest = bytes.fromhex(value)
+
+    @property
+    def previous_hash(self):
+        return decode_digest(self.previous_digest)
+
+    @previous_hash.setter
+    def previous_hash(self, value):
+        self.previous_digest = encode_digest(value)
+
+    @property
+    def metadata(self):
+        # Read-only: edits go through update_metadata() so the root is rebuilt
+        return MappingProxyType(dict(zip(self._metadata_keys, self._metadata_values)))
+
+    @metadata.setter
+    def metadata(self, metadata):
+        self._metadata_keys = _share(tuple(metadata))
+        self._metadata_values = tuple(metadata.values())
+        self._root = None
+
+    @property
+    def genetic_data(self):
+        return _token_text(self._sealed)
+
+    @genetic_data.setter
+    def genetic_data(self, token):
+        self._sealed = _token_bytes(token)
+        self._root = None
+
+    @property
+    def field_salt(self):
+        return _token_text(self._sealed_salt)
+
+    @field_salt.setter
+    def field_salt(self, token):
+        self._sealed_salt = _token_bytes(token)
+        self._root = None
+
+    @property
+    def field_hashes(self):
+        digests = self._field_digests
+        return {name: digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE].hex()
+                for i, name in enumerate(self._field_names)}
+
+    @field_hashes.setter
+    def field_hashes(self, field_hashes):
+        self._field_names = _share(tuple(sorted(field_hashes)))
+        self._field_digests = b"".join(bytes.fromhex(field_hashes[name]) for name in self._field_names)
+        self._root = None
+
+    # ---- Construction ----
+    @classmethod
+    def from_stored(cls, index, timestamp, metadata, encrypted_data, previous_hash, block_hash,
+                    field_hashes=None, field_salt=""):
+        # Rebuild a block whose genetic data is already encrypted (e.g. read from disk)
+        block = cls.__new__(cls)
+        block.index = index
+        block.timestamp = sys.intern(timestamp) if isinstance(timestamp, str) else timestamp
+        block.metadata = metadata
+        block.genetic_data = encrypted_data
+        block.field_hashes = field_hashes or {}
+        block.field_salt = field_salt
+        block.previous_hash = previous_hash
+        block.digest = bytes.fromhex(block_hash) if block_hash else None
+        return block
+
+    @classmethod
+    def from_canonical(cls, index, timestamp, field_bytes, previous_digest, digest):
+        # Rebuild from the canonical field encoding and raw digests (ledger file, replication)
+        metadata, encrypted_data, field_hashes, field_salt = decode_fields(field_bytes)
+        block = cls.from_stored(index, timestamp, metadata, encrypted_data, GENESIS_PREV_HASH, None,
+                                field_hashes, field_salt)
+        block.previous_digest = previous_digest
+        block.digest = digest
+        return block
+
+    def _invalidate(self):
+        self._root = None
+
+    def update_metadata(self, updates):
+        metadata = dict(zip(self._metadata_keys, self._metadata_values))
+        metadata.update(updates)
+        self.metadata = metadata
+
+    def set_genetic_data(self, genetic_data):
+        # Keep the block's salt so only the fields that really changed get new leaves
+        salt = bytes.fromhex(decrypt_data(self.field_salt)) if self.field_salt else None
+        self.genetic_data, self.field_hashes, self.field_salt = seal_genetic_data(genetic_data, salt)
+        self._invalidate()
+
+    # ---- Encoding and hashing ----
+    def field_bytes(self):
+        # Canonical encoding of everything but the header, used by the ledger file and replication
+        return encode_fields(self.metadata, _token_ascii(self._sealed), self.field_hashes,
+                             _token_ascii(self._sealed_salt))
+
+    def header_bytes(self):
+        return encode_raw_header(self.index, self.timestamp, self.merkle_root(), self.previous_digest)
+
+    def merkle_leaves(self):
+        leaves = [("metadata:" + key, leaf_hash("metadata:" + key, value))
+                  for key, value in sorted(zip(self._metadata_keys, self._metadata_values))]
+        digests = self._field_digests
+        leaves += [("genetic:" + name, digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+                   for i, name in enumerate(self._field_names)]
+        leaves.append(("genetic_data", leaf_hash("genetic_data", _token_ascii(self._sealed))))
+        leaves.append(("field_salt", leaf_hash("field_salt", _token_ascii(self._sealed_salt))))
+        return leaves
+
+    def merkle_root(self):
+        if self._root is None:
+            self._root = merkle_root([digest for _, digest in self.merkle_leaves()])
+        return self._root
+
+    def calculate_digest(self):
+        return hashlib.sha256(self.header_bytes()).digest()
+
+    def calculate_hash(self):
+        return self.calculate_digest().hex()
+
+    def changed_fields(self, other):
+        # Names of the fields that differ from `other`, without decrypting
+        mine, theirs = self.merkle_leaves(), other.merkle_leaves()
+        if [name for name, _ in mine] != [name for name, _ in theirs]:
+            mine, theirs = dict(mine), dict(theirs)
+            return sorted(name for name in mine.keys() | theirs.keys() if mine.get(name) != theirs.get(name))
+        positions = diff_leaves([d for _, d in mine], [d for _, d in theirs])
+        return [mine[position][0] for position in positions]
+
+    def field_proof(self, name):
+        leaves = self.merkle_leaves()
+        names = [leaf_name for leaf_name, _ in leaves]
+        position = names.index(name)
+        digests = [digest for _, digest in leaves]
+        return {
+            "field": name,
+            "position": position,
+            "proof": [None if node is None else node.hex() for node in inclusion_proof(digests, position)],
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "merkle_root": merkle_root(digests).hex(),
+            "previous_hash": self.previous_hash,
+        }
+
+# ==== Block Table ====
+# A chain stored column-wise: block hashes, previous hashes and Merkle roots
+# in contiguous byte arrays, timestamps and (metadata keys, genetic field
+# names) shapes as ids into an interned table, and everything else a block
+# holds packed back to back in one blob. Indexing builds a fresh Block from
+# the columns (edits go to that copy; replicas own() theirs anyway), and
+# digest_at() reads a hash without building one. Blocks that cannot be packed
+# as is (non-text metadata values, tokens that aren't canonical base64) are
+# kept whole.
+class BlockTable:
+    def __init__(self, blocks=()):
+        self._digests = bytearray()
+        self._previous = bytearray()
+        self._roots = bytearray()
+        self._timestamps = array("I")
+        self._shapes = array("I")
+        self._offsets = array("Q", [0])
+        self._blob = bytearray()
+        self._ids = {}      # timestamp or shape -> id
+        self._values = []   # id -> timestamp or shape
+        self._indices = {}  # position -> block index, where the two differ
+        self._loose = {}    # position -> block kept whole
+        for block in blocks:
+            self.append(block)
+
+    def _intern(self, value):
+        ident = self._ids.get(value)
+        if ident is None:
+            ident = self._ids[value] = len(self._values)
+            self._values.append(value)
+        return ident
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def _position(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("block table index out of range")
+        return index
+
+    def append(self, block):
+        position = len(self)
+        self._digests += block.digest
+        self._previous += block.previous_digest
+        self._roots += block.merkle_root()
+        self._timestamps.append(self._intern(block.timestamp))
+        self._shapes.append(self._intern((block._metadata_keys, block._field_names)))
+        if block.index != position:
+            self._indices[position] = block.index
+        if (all(isinstance(value, str) for value in block._metadata_values)
+                and isinstance(block._sealed, bytes) and isinstance(block._sealed_salt, bytes)):
+            self._blob += b"".join([pack_str(value) for value in block._metadata_values]
+                                   + [block._field_digests, pack_bytes(block._sealed), pack_bytes(block._sealed_salt)])
+        else:
+            self._loose[position] = copy.copy(block)
+        self._offsets.append(len(self._blob))
+
+    def extend(self, blocks):
+        for block in blocks:
+            self.append(block)
+
+    def digest_at(self, index):
+        # Hot in verification, so the slice length doubles as the bounds check
+        if index < 0:
+            index += len(self._shapes)
+        start = index * DIGEST_SIZE
+        digest = bytes(self._digests[start:start + DIGEST_SIZE])
+        if index < 0 or len(digest) != DIGEST_SIZE:
+            raise IndexError("block table index out of range")
+        return digest
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        position = self._position(index)
+        if position in self._loose:
+            return copy.copy(self._loose[position])
+        start, end = position * DIGEST_SIZE, (position + 1) * DIGEST_SIZE
+        block = Block.__new__(Block)
+        block.index = self._indices.get(position, position)
+        block.timestamp = self._values[self._timestamps[position]]
+        block._metadata_keys, block._field_names = self._values[self._shapes[position]]
+        block.previous_digest = bytes(self._previous[start:end])
+        block.digest = bytes(self._digests[start:end])
+        block._root = bytes(self._roots[start:end])
+
+        blob, offset = self._blob, self._offsets[position]
+        values = []
+        for _ in block._metadata_keys:
+            value, offset = unpack_bytes(blob, offset)
+            values.append(value.decode("utf-8"))
+        block._metadata_values = tuple(values)
+        size = len(block._field_names) * DIGEST_SIZE
+        block._field_digests = bytes(blob[offset:offset + size])
+        block._sealed, offset = unpack_bytes(blob, offset + size)
+        block._sealed_salt, offset = unpack_bytes(blob, offset)
+        return block
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+# ==== Field Verification ====
+def verify_field(proof, value, block_hash, salt=None):
+    # Check one field against a block hash. Genetic fields need the decrypted
+    # salt (hex) the data owner shares along with the value.
+    name = proof["field"]
+    if name.startswith("genetic:"):
+        if salt is None:
+            return False
+        leaf = leaf_hash(name, value, bytes.fromhex(salt))
+    else:
+        leaf = leaf_hash(name, value)
+    nodes = [None if node is None else bytes.fromhex(node) for node in proof["proof"]]
+    root = bytes.fromhex(proof["merkle_root"])
+    if not verify_proof(leaf, proof["position"], nodes, root):
+        return False
+    header = encode_header(proof["index"], proof["timestamp"], root, proof["previous_hash"])
+    return hashlib.sha256(header).hexdigest() == block_hash
+
+# ==== Chain Construction ====
+def build_chain(records, timestamp=None, previous_hash="0", index=None):
+    # records: (metadata, genetic_data) pairs. Each block is stamped with
+    # `timestamp`, or the current time when none is given. An `index`
+    # (indexes.ChainIndex) is filled from the plaintext on the way.
+    chain = BlockTable()
+    for metadata, genetic_data in records:
+        when = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        block = Block(len(chain), when, metadata, genetic_data, previous_hash)
+        if index is not None:
+            index.add(len(chain), metadata, genetic_data if isinstance(genetic_data, dict) else None)
+        chain.append(block)
+        previous_hash = block.hash
+    return chain
@@ -0,0 +1,265 @@
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from blockchain import build_chain
+from indexes import parse_genetic
+from ledger_store import LedgerStore
+from replica import digest_at
+
+# ==== Monte Carlo Tamper Campaigns ====
+# Runs many randomized attacks against a ledger and its replicas and reports,
+# per consensus setting (replica count x quorum rule), how often the attack
+# was caught, how long the incremental verifier took to flag it, and how
+# often it slipped through.
+#
+# Trials run in batches on a process pool. Every worker builds its ledgers
+# once; an attack goes through the LedgerStore mutation methods, is checked,
+# and is undone with restore(), which only drops the tampered copies. Batch
+# `n` draws from random.Random(seed * 1_000_003 + n), so a campaign makes the
+# same attacks whatever the worker count.
+#
+# Outcome of a trial, judged at the first height where the servers disagree:
+#   detected        the honest block still has a quorum there, so the
+#                   tampered servers are identified and can be restored
+#   unresolved      servers disagree but no version reaches the quorum
+#   false negative  nothing was flagged, or the forged block has the quorum
+# Time to detect is how long the verifier's check took on trials that raised
+# an alarm (detected or unresolved).
+
+ATTACKS = ["alter", "delete", "single_field", "metadata", "tail_rehash", "collude"]
+
+QUORUMS = {
+    "majority": lambda votes, servers: votes * 2 > servers,
+    "supermajority": lambda votes, servers: votes * 3 >= servers * 2,
+    "unanimous": lambda votes, servers: votes == servers,
+}
+
+BASES = "ACGT"
+
+
+def campaign_chain(length, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(length):
+        metadata = {"Patient ID": f"P{i + 1:03d}", "Test Date": "2023-08-01", "Sample Code": f"S{i + 1}"}
+        genetic = {
+            "SNP_ID": f"rs{1000 + i}",
+            "Genotype": rng.choice(["A/A", "A/G", "G/G"]),
+            "Trait": "Simulated",
+            "Genetic_Sequence": "".join(rng.choices(BASES, k=10)),
+        }
+        records.append((metadata, genetic))
+    return build_chain(records, "2023-08-01 00:00:00")
+
+
+# ---- Attacks ----
+# Each takes (store, labels, rng) and returns (height, tampered labels).
+def _sequence(rng):
+    return "".join(rng.choices(BASES, k=10))
+
+def attack_alter(store, labels, rng):
+    # The app.py attack: overwrite a record's DNA in place
+    label, height = rng.choice(labels), rng.randrange(len(store.chain))
+    store.replace_genetic_data(label, height, {"Genetic_Sequence": _sequence(rng)})
+    return height, [label]
+
+def attack_delete(store, labels, rng):
+    label, height = rng.choice(labels), rng.randrange(len(store.chain))
+    store.delete_block(label, height)
+    return height, [label]
+
+def attack_single_field(store, labels, rng):
+    label, height = rng.choice(labels), rng.randrange(len(store.chain))
+    genetic = parse_genetic(store.servers[label][height].genetic_data)
+    field = rng.choice(sorted(genetic))
+    genetic[field] = _sequence(rng) if field == "Genetic_Sequence" else f"{genetic[field]}*"
+    store.replace_genetic_data(label, height, genetic)
+    return height, [label]
+
+def attack_metadata(store, labels, rng):
+    # The app3.6 "Simulate Hack": one metadata edit, only that block rehashed
+    label, height = rng.choice(labels), rng.randrange(len(store.chain))
+    store.edit_metadata(label, height, {"Patient ID": f"X{rng.randrange(10 ** 6)}"}, propagate=False)
+    return height, [label]
+
+def attack_tail_rehash(store, labels, rng):
+    # Edit, then rewrite every later block so the server's own links check out
+    label, height = rng.choice(labels), rng.randrange(len(store.chain))
+    store.edit_metadata(label, height, {"Patient ID": f"X{rng.randrange(10 ** 6)}"})
+    return height, [label]
+
+def attack_collude(store, labels, rng, colluders=None):
+    # Several servers make the same tail-rehash edit, so their forged blocks agree
+    count = colluders or rng.randint(2, len(labels))
+    chosen = rng.sample(labels, min(count, len(labels)))
+    height = rng.randrange(len(store.chain))
+    updates = {"Patient ID": f"X{rng.randrange(10 ** 6)}"}
+    for label in chosen:
+        store.edit_metadata(label, height, updates)
+    return height, chosen
+
+ATTACK_FUNCTIONS = {
+    "alter": attack_alter,
+    "delete": attack_delete,
+    "single_field": attack_single_field,
+    "metadata": attack_metadata,
+    "tail_rehash": attack_tail_rehash,
+    "collude": attack_collude,
+}
+
+
+# ---- Judging a trial ----
+def _digest(chain, height):
+    return digest_at(chain, height) if height < len(chain) else None
+
+def judge(store, quorum):
+    # Returns (outcome, seconds the verifier took to flag the servers)
+    started = time.perf_counter()
+    flagged = {label: store.verifier.first_divergence(label) for label in store.servers}
+    seconds = time.perf_counter() - started
+    heights = [height for height in flagged.values() if height is not None]
+    if not heights:
+        return "false_negative", seconds
+    height = min(heights)
+    honest = _digest(store.chain, height)
+    votes = {}
+    for chain in store.servers.values():
+        digest = _digest(chain, height)
+        votes[digest] = votes.get(digest, 0) + 1
+    servers = len(store.servers)
+    if quorum(votes.get(honest, 0), servers):
+        return "detected", seconds
+    if any(quorum(count, servers) for digest, count in votes.items() if digest != honest):
+        return "false_negative", seconds
+    return "unresolved", seconds
+
+
+# ---- Workers ----
+_worker_chain = None
+_worker_stores = {}
+
+def _init_worker(length, chain_seed):
+    global _worker_chain
+    _worker_chain = campaign_chain(length, chain_seed)
+    _worker_stores.clear()
+
+def _store_for(replicas):
+    store = _worker_stores.get(replicas)
+    if store is None:
+        store = LedgerStore(lambda: _worker_chain, [f"Server {n}" for n in range(1, replicas + 1)])
+        _worker_stores[replicas] = store
+    return store
+
+def _empty_stats():
+    return {"trials": 0, "detected": 0, "unresolved": 0, "false_negative": 0,
+            "seconds_to_detect": 0.0, "max_seconds_to_detect": 0.0}
+
+def _run_batch(batch, trials, seed, settings, attacks, colluders):
+    rng = random.Random(seed * 1_000_003 + batch)
+    results = {}
+    for _ in range(trials):
+        attack = rng.choice(attacks)
+        replicas, quorum_name = rng.choice(settings)
+        store = _store_for(replicas)
+        labels = list(store.servers)
+        if attack == "collude":
+            attack_collude(store, labels, rng, colluders)
+        else:
+            ATTACK_FUNCTIONS[attack](store, labels, rng)
+        outcome, seconds = judge(store, QUORUMS[quorum_name])
+        store.restore()
+
+        stats = results.setdefault((replicas, quorum_name, attack), _empty_stats())
+        stats["trials"] += 1
+        stats[outcome] += 1
+        if outcome != "false_negative":
+            stats["seconds_to_detect"] += seconds
+            stats["max_seconds_to_detect"] = max(stats["max_seconds_to_detect"], seconds)
+    return results
+
+
+def _merge(total, part):
+    for key, stats in part.items():
+        into = total.setdefault(key, _empty_stats())
+        for name, value in stats.items():
+            into[name] = max(into[name], value) if name.startswith("max_") else into[name] + value
+
+def _summary(stats):
+    trials = stats["trials"]
+    alarms = stats["detected"] + stats["unresolved"]
+    return {
+        "trials": trials,
+        "detection_rate": stats["detected"] / trials if trials else None,
+        "alarm_rate": alarms / trials if trials else None,
+        "unresolved_rate": stats["unresolved"] / trials if trials else None,
+        "false_negatives": stats["false_negative"],
+        "false_negative_rate": stats["false_negative"] / trials if trials else None,
+        "mean_seconds_to_detect": stats["seconds_to_detect"] / alarms if alarms else None,
+        "max_seconds_to_detect": stats["max_seconds_to_detect"] if alarms else None,
+    }
+
+
+def run_campaign(trials=100000, replicas=(3, 5, 7), quorums=("majority",), attacks=ATTACKS,
+                 chain_length=32, workers=None, batch_size=2000, seed=0, colluders=None):
+    settings = [(count, name) for count in replicas for name in quorums]
+    batches = [(n, min(batch_size, trials - start)) for n, start in enumerate(range(0, trials, batch_size))]
+    started = time.perf_counter()
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(chain_length, seed)) as pool:
+        futures = [pool.submit(_run_batch, n, count, seed, settings, list(attacks), colluders)
+                   for n, count in batches]
+        for future in futures:
+            _merge(totals, future.result())
+    elapsed = time.perf_counter() - started
+
+    report = {"trials": trials, "chain_length": chain_length, "seed": seed,
+              "seconds": elapsed, "trials_per_second": trials / elapsed if elapsed else None,
+              "settings": []}
+    for count, name in settings:
+        overall = _empty_stats()
+        by_attack = {}
+        for attack in attacks:
+            stats = totals.get((count, name, attack))
+            if stats is not None:
+                _merge({"all": overall}, {"all": stats})
+                by_attack[attack] = _summary(stats)
+        report["settings"].append(dict(replicas=count, quorum=name, **_summary(overall), attacks=by_attack))
+    return report
+
+
+def int_list(value):
+    return [int(float(part)) for part in value.split(",") if part]
+
+def name_list(value):
+    return [part for part in value.split(",") if part]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo tamper campaign and print JSON.")
+    parser.add_argument("--trials", type=lambda v: int(float(v)), default=100000)
+    parser.add_argument("--replicas", type=int_list, default=[3, 5, 7])
+    parser.add_argument("--quorums", type=name_list, default=["majority"],
+                        help=f"comma-separated, from {', '.join(QUORUMS)}")
+    parser.add_argument("--attacks", type=name_list, default=ATTACKS,
+                        help=f"comma-separated, from {', '.join(ATTACKS)}")
+    parser.add_argument("--chain-length", type=int, default=32)
+    parser.add_argument("--colluders", type=int, help="servers per colluding attack (default: random)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name in args.quorums:
+        if name not in QUORUMS:
+            parser.error(f"unknown quorum {name!r}")
+    for name in args.attacks:
+        if name not in ATTACK_FUNCTIONS:
+            parser.error(f"unknown attack {name!r}")
+    report = run_campaign(args.trials, args.replicas, args.quorums, args.attacks, args.chain_length,
+                          args.workers, args.batch_size, args.seed, args.colluders)
+    json.dump(report, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,85 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+# ==== Windowed Chain Rendering ====
+# Only the current page of blocks is turned into markdown/dataframe rows, so
+# render cost follows the page size rather than the chain length.
+
+TAMPERED_COLOR = "#FFCDD2"  # red for tampered or affected block
+MISSING_COLOR = "#EEEEEE"   # grey for a height the server no longer holds
+VIEW_MODES = ["Cards", "Divergent blocks only", "Table"]
+
+
+def block_card(block, bg_color):
+    st.markdown(f"""
+        <div style="background-color: {bg_color}; padding: 10px; border-radius: 5px; margin-bottom: 10px;
+                    font-family: monospace; max-width: 100%; word-wrap: break-word; overflow-wrap: break-word;">
+            <strong>Block #{block.index}</strong><br>
+            <strong>Timestamp:</strong> {block.timestamp}<br>
+            <strong>Metadata:</strong> {block.metadata}<br>
+            <strong>Prev Hash:</strong> <span style="word-break: break-all;">{block.previous_hash}</span><br>
+            <strong>Hash:</strong> <span style="word-break: break-all;">{block.hash}</span>
+        </div>
+    """, unsafe_allow_html=True)
+
+
+def missing_card(index):
+    st.markdown(f"""
+        <div style="background-color: {MISSING_COLOR}; border: 2px dashed {TAMPERED_COLOR}; padding: 10px;
+                    border-radius: 5px; margin-bottom: 10px; font-family: monospace;">
+            <strong>Block #{index}</strong><br>
+            ❌ Missing on this server
+        </div>
+    """, unsafe_allow_html=True)
+
+
+def render_chain_status(servers, original_chain, colors, divergent, captions=None, key="chain"):
+    # `divergent` maps each server label to the heights where it disagrees
+    # with the majority (the consensus result); it drives the divergent-only
+    # view and the table's status column.
+    controls = st.columns(3)
+    with controls[0]:
+        mode = st.radio("View:", VIEW_MODES, horizontal=True, key=f"{key}_mode")
+    with controls[1]:
+        page_size = st.selectbox("Blocks per page:", [5, 10, 25, 50, 100], index=1, key=f"{key}_page_size")
+
+    if mode == "Divergent blocks only":
+        heights = sorted(set().union(*divergent.values()))
+    else:
+        heights = range(len(original_chain))
+    pages = max(1, math.ceil(len(heights) / page_size))
+    with controls[2]:
+        page = st.number_input("Page:", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    visible = heights[(page - 1) * page_size:page * page_size]
+
+    if not len(visible):
+        st.success("✅ No divergent blocks: every server agrees with the majority.")
+        return
+    st.caption(f"Showing blocks #{visible[0]}–#{visible[-1]} ({len(heights)} in view, page {page} of {pages})")
+
+    if mode == "Table":
+        flagged = {label: set(heights_) for label, heights_ in divergent.items()}
+        rows = []
+        for i in visible:
+            row = {"Block": i, "Timestamp": original_chain[i].timestamp}
+            for label, chain in servers.items():
+                row[label] = chain[i].hash[:16] + "…" if i < len(chain) else "(missing)"
+                row[f"{label} status"] = "❌ minority" if i in flagged.get(label, ()) else "✅"
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+        return
+
+    for column, (label, chain) in zip(st.columns(len(servers)), servers.items()):
+        with column:
+            st.markdown(f"**{label}**")
+            if captions and label in captions:
+                st.caption(captions[label])
+            for i in visible:
+                if i >= len(chain):
+                    missing_card(i)
+                    continue
+                block = chain[i]
+                bg_color = TAMPERED_COLOR if block.hash != original_chain[i].hash else colors[label]
+                block_card(block, bg_color)
@@ -0,0 +1,135 @@
+import hashlib
+
+from merkle import LEAF_PREFIX, node_hash
+from replica import digest_at
+
+# ==== Merkle Mountain Range over Block Hashes ====
+# levels[k][j] commits to blocks [j * 2^k, (j + 1) * 2^k). Any prefix of the
+# chain is covered by at most log2(n) perfect subtrees ("peaks"), so two
+# ranges can be compared peak by peak and then bisected down a single
+# subtree: the first divergent height costs O(log n) digest comparisons.
+# Unlike plain block hashes, a node changes whenever any block under it
+# changes, even if later blocks were never rehashed.
+
+
+def _leaf(block_digest):
+    return hashlib.sha256(LEAF_PREFIX + block_digest).digest()
+
+
+class MountainRange:
+    def __init__(self):
+        self.levels = [[]]
+
+    @classmethod
+    def from_chain(cls, chain):
+        mmr = cls()
+        for height in range(len(chain)):
+            mmr.append(digest_at(chain, height))
+        return mmr
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def node(self, level, position):
+        return self.levels[level][position]
+
+    def _set(self, level, position, digest):
+        self.levels[level][position] = digest
+
+    def append(self, block_digest):
+        leaves = self.levels[0]
+        leaves.append(_leaf(block_digest))
+        position, level = len(leaves) - 1, 0
+        # A right child completes a pair, so its parent can be added
+        while position % 2 == 1:
+            if len(self.levels) == level + 1:
+                self.levels.append([])
+            self.levels[level + 1].append(node_hash(self.node(level, position - 1), self.node(level, position)))
+            position //= 2
+            level += 1
+
+    def update(self, index, block_digest):
+        # Rewrite one leaf and the O(log n) nodes above it
+        self._set(0, index, _leaf(block_digest))
+        self._rehash_up(index)
+
+    def _rehash_up(self, index):
+        position, level = index, 0
+        while level + 1 < len(self.levels) and position // 2 < len(self.levels[level + 1]):
+            left = position & ~1
+            self._set(level + 1, position // 2, node_hash(self.node(level, left), self.node(level, left + 1)))
+            position //= 2
+            level += 1
+
+    def peaks(self, length=None):
+        # (level, position) of the perfect subtrees covering the first `length` blocks
+        length = len(self) if length is None else length
+        result, start = [], 0
+        for level in reversed(range(length.bit_length())):
+            if length >> level & 1:
+                result.append((level, start >> level))
+                start += 1 << level
+        return result
+
+    def root(self):
+        return hashlib.sha256(b"".join(self.node(level, pos) for level, pos in self.peaks())).digest()
+
+
+class OverlayRange(MountainRange):
+    # Copy-on-write view of a base range, mirroring Replica: nodes a replica
+    # has rewritten live in a small dict, everything else reads through.
+    def __init__(self, base):
+        self.base = base
+        self._nodes = {}
+        self._length = None  # set once the replica dropped blocks, as Replica.truncate
+
+    @property
+    def levels(self):
+        return self.base.levels
+
+    def __len__(self):
+        return len(self.base) if self._length is None else min(self._length, len(self.base))
+
+    def node(self, level, position):
+        digest = self._nodes.get((level, position))
+        return digest if digest is not None else self.base.node(level, position)
+
+    def _set(self, level, position, digest):
+        self._nodes[(level, position)] = digest
+
+    def append(self, block_digest):
+        raise TypeError("append to the base range; overlays only record rewrites")
+
+    def refresh(self):
+        # After the base grew: parents and peaks it just added were hashed from
+        # canonical leaves, so rebuild the ones above every rewritten leaf.
+        # Left to right, so a shared ancestor is last rebuilt from fresh children.
+        for position in sorted(position for level, position in self._nodes if level == 0):
+            self._rehash_up(position)
+
+    def truncate(self, length):
+        # Forget the leaves from `length` on, and every node that covers one
+        self._length = length
+        for level, position in [key for key in self._nodes if (key[1] + 1) << key[0] > length]:
+            del self._nodes[(level, position)]
+
+    def reset(self):
+        self._nodes.clear()
+        self._length = None
+
+
+def first_divergence(a, b):
+    # Returns (first differing height or None, digest comparisons made)
+    common = min(len(a), len(b))
+    comparisons = 0
+    for level, position in a.peaks(common):
+        comparisons += 1
+        if a.node(level, position) != b.node(level, position):
+            while level > 0:
+                level -= 1
+                position *= 2
+                comparisons += 1
+                if a.node(level, position) == b.node(level, position):
+                    position += 1
+            return position, comparisons
+    return (common if len(a) != len(b) else None), comparisons
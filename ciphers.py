@@ -0,0 +1,130 @@
+import base64
+import os
+
+# ==== Pluggable Cipher Layer ====
+# Every backend turns text (or bytes) into a printable token and back. The authenticated
+# backends prepend a fresh 12-byte nonce to each record. Batch calls can fan
+# out over a thread pool (see _fan_out).
+#
+# The default backend comes from GENEBLOCK_CIPHER ("plaintext-debug",
+# "aes-gcm" or "chacha20-poly1305"); the authenticated ones read a 32-byte hex
+# key from GENEBLOCK_KEY so that every process (e.g. ingest workers) agrees
+# on it. Without a key they raise ValueError, unless the caller accepts a
+# random key that lives as long as the process (the apps, whose ledgers do too).
+
+NONCE_SIZE = 12
+KEY_SIZE = 32
+
+
+def _plain_bytes(text):
+    # Binary payloads (e.g. packed sequences) are sealed as they are
+    return text if isinstance(text, bytes) else str(text).encode("utf-8")
+
+
+class PlaintextDebugCipher:
+    # The original base64 encoding: no secrecy, kept for debugging and as the
+    # baseline in benchmarks.
+    name = "plaintext-debug"
+
+    def encrypt(self, text, aad=None):
+        return base64.b64encode(_plain_bytes(text)).decode("utf-8")
+
+    def decrypt_raw(self, token, aad=None):
+        return base64.b64decode(token.encode("utf-8"))
+
+    def decrypt(self, token, aad=None):
+        return self.decrypt_raw(token, aad).decode("utf-8")
+
+
+class _AEADCipher:
+    name = None
+
+    def __init__(self, key):
+        if len(key) != KEY_SIZE:
+            raise ValueError(f"{self.name} needs a {KEY_SIZE}-byte key")
+        self._aead = self._make(key)
+
+    def encrypt(self, text, aad=None):
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._aead.encrypt(nonce, _plain_bytes(text), aad)
+        return base64.b64encode(nonce + sealed).decode("ascii")
+
+    def decrypt_raw(self, token, aad=None):
+        raw = base64.b64decode(token.encode("ascii"))
+        return self._aead.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], aad)
+
+    def decrypt(self, token, aad=None):
+        return self.decrypt_raw(token, aad).decode("utf-8")
+
+
+class AESGCMCipher(_AEADCipher):
+    name = "aes-gcm"
+
+    def _make(self, key):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        return AESGCM(key)
+
+
+class ChaCha20Poly1305Cipher(_AEADCipher):
+    name = "chacha20-poly1305"
+
+    def _make(self, key):
+        from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+        return ChaCha20Poly1305(key)
+
+
+BACKENDS = {
+    cls.name: cls for cls in (PlaintextDebugCipher, AESGCMCipher, ChaCha20Poly1305Cipher)
+}
+
+
+def generate_key():
+    return os.urandom(KEY_SIZE)
+
+def get_cipher(name, key=None):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown cipher backend {name!r} (choose from {', '.join(BACKENDS)})")
+    if name == PlaintextDebugCipher.name:
+        return PlaintextDebugCipher()
+    if key is None:
+        raise ValueError(f"{name} needs a key (set GENEBLOCK_KEY to 64 hex characters)")
+    return BACKENDS[name](key)
+
+def cipher_from_env(default=PlaintextDebugCipher.name, ephemeral_key=False):
+    name = os.environ.get("GENEBLOCK_CIPHER", default)
+    key = os.environ.get("GENEBLOCK_KEY")
+    if key:
+        key = bytes.fromhex(key)
+    elif ephemeral_key and name != PlaintextDebugCipher.name:
+        key = generate_key()
+    return get_cipher(name, key)
+
+
+# ---- Batch API ----
+# Serial unless the caller asks for two or more workers. Per record, the
+# base64 and call overhead runs under the GIL; only the cipher core releases
+# it, so threads only pay off for large payloads on several cores. On
+# SNP-sized records (200 bytes) the pool measured slower than a plain loop
+# (aes-gcm decrypt 176k vs 207k records/s). Records go to the pool in slices
+# so per-task overhead is paid once per slice.
+def _fan_out(fn, items, workers, batch):
+    items = list(items)
+    if not workers or workers < 2 or len(items) <= batch:
+        return [fn(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor  # only big batches pay for the import
+    slices = [items[i:i + batch] for i in range(0, len(items), batch)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [result for part in pool.map(lambda part: [fn(item) for item in part], slices) for result in part]
+
+def encrypt_many(cipher, texts, workers=None, batch=1024):
+    return _fan_out(cipher.encrypt, texts, workers, batch)
+
+def decrypt_many(cipher, tokens, workers=None, batch=1024, failed="[Decryption Failed]", raw=False):
+    decrypt = cipher.decrypt_raw if raw else cipher.decrypt
+
+    def attempt(token):
+        try:
+            return decrypt(token)
+        except Exception:
+            return failed
+    return _fan_out(attempt, tokens, workers, batch)
@@ -0,0 +1,138 @@
+import numpy as np
+
+from ledger_file import DIGEST_OFFSET, HEADER
+from replica import digest_at
+
+# ==== Vectorized N-Server Consensus ====
+# Replica state is a servers x blocks matrix of raw 32-byte SHA-256 digests.
+# One pass over column chunks gives the majority digest per height, which
+# servers disagree with it, and where each server first diverges.
+
+DIGEST_SIZE = 32
+
+
+def digests_from_chain(chain, height=None):
+    height = len(chain) if height is None else height
+    row = np.zeros((height, DIGEST_SIZE), dtype=np.uint8)
+    if len(chain):
+        raw = b"".join(digest_at(chain, i) for i in range(len(chain)))
+        row[:len(chain)] = np.frombuffer(raw, dtype=np.uint8).reshape(len(chain), DIGEST_SIZE)
+    return row
+
+
+def digests_from_ledger(ledger, height=None):
+    # Digest column of a LedgerFile's packed headers, without decoding any block
+    height = len(ledger) if height is None else height
+    row = np.zeros((height, DIGEST_SIZE), dtype=np.uint8)
+    if len(ledger):
+        records = np.frombuffer(ledger.raw_headers(), dtype=np.uint8).reshape(len(ledger), HEADER.size)
+        row[:len(ledger)] = records[:, DIGEST_OFFSET:DIGEST_OFFSET + DIGEST_SIZE]
+    return row
+
+
+class ConsensusResult:
+    def __init__(self, labels, majority, votes, minority):
+        self.labels = labels
+        self.majority = majority      # (blocks, 32) majority digest per height
+        self.votes = votes            # (blocks,) servers agreeing with it
+        self.minority = minority      # (servers, blocks) True where a server disagrees
+
+    def majority_hash(self, index):
+        return self.majority[index].tobytes().hex()
+
+    def minority_servers(self, index):
+        return [self.labels[s] for s in np.flatnonzero(self.minority[:, index])]
+
+    def first_divergence(self):
+        # label -> first height where that server leaves the majority (None if never)
+        bad = self.minority.any(axis=1)
+        first = self.minority.argmax(axis=1)
+        return {label: (int(first[s]) if bad[s] else None) for s, label in enumerate(self.labels)}
+
+    def first_divergent_height(self):
+        columns = np.flatnonzero(self.minority.any(axis=0))
+        return int(columns[0]) if len(columns) else None
+
+
+class DigestMatrix:
+    def __init__(self, labels, digests):
+        self.labels = list(labels)
+        self.digests = digests  # uint8 array, shape (servers, blocks, 32)
+
+    @classmethod
+    def from_servers(cls, servers):
+        # Shorter replicas are padded with all-zero digests, i.e. counted as missing blocks
+        height = max((len(chain) for chain in servers.values()), default=0)
+        digests = np.zeros((len(servers), height, DIGEST_SIZE), dtype=np.uint8)
+        for s, chain in enumerate(servers.values()):
+            digests[s] = digests_from_chain(chain, height)
+        return cls(servers.keys(), digests)
+
+    @classmethod
+    def from_ledgers(cls, ledgers):
+        # label -> LedgerFile; digests come straight from the mapped headers
+        height = max((len(ledger) for ledger in ledgers.values()), default=0)
+        digests = np.zeros((len(ledgers), height, DIGEST_SIZE), dtype=np.uint8)
+        for s, ledger in enumerate(ledgers.values()):
+            digests[s] = digests_from_ledger(ledger, height)
+        return cls(ledgers.keys(), digests)
+
+    @property
+    def height(self):
+        return self.digests.shape[1]
+
+    def set_hash(self, label, index, block_hash):
+        self.digests[self.labels.index(label), index] = np.frombuffer(bytes.fromhex(block_hash), dtype=np.uint8)
+
+    def consensus(self, chunk=8192):
+        servers, height = self.digests.shape[:2]
+        words = np.ascontiguousarray(self.digests).view(np.uint64)  # (servers, blocks, 4)
+        majority = np.zeros((height, DIGEST_SIZE // 8), dtype=np.uint64)
+        votes = np.zeros(height, dtype=np.int64)
+        minority = np.zeros((servers, height), dtype=bool)
+        for start in range(0, height, chunk):
+            stop = min(start + chunk, height)
+            block = words[:, start:stop]
+
+            # Take the majority server of the chunk's first height as the
+            # candidate row. Wherever it already holds a strict majority it is
+            # the winner; only the remaining heights need an actual vote.
+            candidate = _vote(block[:, :1])[0]
+            row = (block[:, 0] == candidate).all(axis=1).argmax()
+            winner = block[row].copy()
+            disagree = _differs(block, winner)
+            contested = np.flatnonzero((servers - disagree.sum(axis=0)) * 2 <= servers)
+            if len(contested):
+                winner[contested] = _vote(block[:, contested])
+                disagree[:, contested] = _differs(block[:, contested], winner[contested])
+
+            majority[start:stop] = winner
+            minority[:, start:stop] = disagree
+            votes[start:stop] = servers - disagree.sum(axis=0)
+        return ConsensusResult(self.labels, majority.view(np.uint8).reshape(height, DIGEST_SIZE), votes, minority)
+
+
+def _differs(block, winner):
+    # (servers, columns) mask of digests that differ from the winner, OR-ing
+    # the XOR of the four words instead of materialising a per-byte mask
+    diff = block[:, :, 0] ^ winner[None, :, 0]
+    for word in range(1, DIGEST_SIZE // 8):
+        diff |= block[:, :, word] ^ winner[None, :, word]
+    return diff != 0
+
+
+def _vote(block):
+    # Per-column mode of a (servers, columns, 4) block of digest words. Votes
+    # are counted on the first word; the caller's full-digest comparison keeps
+    # the minority flags exact even if two first words ever collided.
+    servers, columns = block.shape[:2]
+    keys = block[:, :, 0].T                     # (columns, servers), contiguous sort axis
+    order = np.argsort(keys, axis=1, kind="stable")
+    ordered = np.take_along_axis(keys, order, axis=1)
+    positions = np.arange(servers)[None, :]
+    new_run = np.ones_like(ordered, dtype=bool)
+    new_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0), axis=1)
+    longest_end = (positions - run_start).argmax(axis=1)
+    winner_server = order[np.arange(columns), longest_end]
+    return block[winner_server, np.arange(columns)]
@@ -0,0 +1,142 @@
+import ast
+import bisect
+import json
+import os
+
+from blockchain import decrypt_data
+
+# ==== Secondary Indexes ====
+# Map metadata keys and the SNP_ID / Trait inside the encrypted payload to block
+# heights. Payload keys are meant to be fed in at ingest time, while the
+# plaintext is still at hand; parse_genetic() is the fallback for chains that
+# were built without them.
+#
+# Ledger ingest persists the keys in an append-only sidecar (<ledger>.index,
+# one JSON line [height, keys] per block), so a ledger's index loads later
+# without decrypting anything. Lines past the ledger's length (an interrupted
+# ingest) are ignored, and a height written twice keeps its last line.
+
+FIELDS = {
+    "patient": "Patient ID",
+    "sample": "Sample Code",
+    "snp": "SNP_ID",
+    "trait": "Trait",
+}
+
+
+def parse_genetic(encrypted_data):
+    try:
+        value = ast.literal_eval(decrypt_data(encrypted_data))
+    except (ValueError, SyntaxError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def index_keys(metadata, genetic):
+    # The values a block is indexed under, by field name
+    genetic = genetic or {}
+    return {
+        "patient": metadata.get("Patient ID"),
+        "sample": metadata.get("Sample Code"),
+        "snp": genetic.get("SNP_ID"),
+        "trait": genetic.get("Trait"),
+        "date": metadata.get("Test Date"),
+    }
+
+
+class ChainIndex:
+    def __init__(self):
+        self._maps = {field: {} for field in FIELDS}
+        self._dates = []      # sorted (Test Date, height) pairs for range queries
+        self._entries = {}    # height -> keys it was indexed under, for removal
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_chain(cls, chain, genetic=None):
+        index = cls()
+        for height, block in enumerate(chain):
+            index.add(height, block.metadata, genetic[height] if genetic else parse_genetic(block.genetic_data))
+        return index
+
+    def add(self, height, metadata, genetic=None):
+        self.add_keys(height, index_keys(metadata, genetic))
+
+    def add_keys(self, height, keys):
+        if height in self._entries:
+            self.discard(height)
+        for field, mapping in self._maps.items():
+            if keys[field] is not None:
+                mapping.setdefault(keys[field], set()).add(height)
+        if keys["date"] is not None:
+            bisect.insort(self._dates, (keys["date"], height))
+        self._entries[height] = keys
+
+    def discard(self, height):
+        keys = self._entries.pop(height, None)
+        if keys is None:
+            return
+        for field, mapping in self._maps.items():
+            heights = mapping.get(keys[field])
+            if heights is not None:
+                heights.discard(height)
+                if not heights:
+                    del mapping[keys[field]]
+        if keys["date"] is not None:
+            pos = bisect.bisect_left(self._dates, (keys["date"], height))
+            if pos < len(self._dates) and self._dates[pos] == (keys["date"], height):
+                del self._dates[pos]
+
+    def lookup(self, field, value):
+        return sorted(self._maps[field].get(value, ()))
+
+    def date_range(self, start, end):
+        # Heights whose Test Date falls in [start, end] (ISO dates compare as strings)
+        lo = bisect.bisect_left(self._dates, (start, -1))
+        hi = bisect.bisect_right(self._dates, (end, float("inf")))
+        return sorted(height for _, height in self._dates[lo:hi])
+
+
+# ---- Persisted index ----
+class IndexLog:
+    # Stands in for a ChainIndex during ingest: every add() is appended to the
+    # sidecar file and forwarded to `index`, if one is given.
+    def __init__(self, path, index=None):
+        self.index = index
+        self._file = open(path, "a+", encoding="utf-8")
+        if self._file.tell():
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")  # finish a line torn by a crash
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, height, metadata, genetic=None):
+        keys = index_keys(metadata, genetic)
+        self._file.write(json.dumps([height, keys]) + "\n")
+        if self.index is not None:
+            self.index.add_keys(height, keys)
+
+    def close(self):
+        self._file.close()
+
+
+def load_index(path, length=None):
+    # None when there is no sidecar file
+    if not os.path.exists(path):
+        return None
+    index = ChainIndex()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                height, keys = json.loads(line)
+            except ValueError:
+                continue  # torn line
+            if length is None or height < length:
+                index.add_keys(height, keys)
+    return index
@@ -0,0 +1,149 @@
+import csv
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from blockchain import Block, seal_genetic_data
+from indexes import IndexLog
+from ledger_file import LedgerFile
+
+# ==== Streaming SNP Ingest ====
+# Variant rows are read in chunks, encrypted on a process pool and linked into
+# blocks in file order on the calling thread. Only `max_pending` chunks are in
+# flight at once, so neither the input file nor the resulting chain is ever
+# held in memory as a whole.
+
+GENETIC_FIELDS = ["SNP_ID", "Chromosome", "Position", "Genotype", "Trait"]
+METADATA_FIELDS = ["Patient ID", "Test Date", "Sample Code"]
+
+
+class IngestProgress:
+    def __init__(self):
+        self.records = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def records_per_second(self):
+        elapsed = self.elapsed
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.records} records in {self.elapsed:.1f}s ({self.records_per_second:,.0f} records/s)"
+
+
+# ---- Readers (one dict per variant row) ----
+def _read_delimited(f, delimiter):
+    for row in csv.DictReader(f, delimiter=delimiter):
+        yield row
+
+def _read_vcf(f):
+    samples = []
+    for line in f:
+        if line.startswith("##"):
+            continue
+        fields = line.rstrip("\n").split("\t")
+        if line.startswith("#"):
+            samples = fields[9:]
+            continue
+        chrom, pos, snp_id, ref, alt = fields[:5]
+        info = dict(item.split("=", 1) for item in fields[7].split(";") if "=" in item) if len(fields) > 7 else {}
+        row = {
+            "SNP_ID": snp_id,
+            "Chromosome": chrom,
+            "Position": pos,
+            "Genotype": f"{ref}/{alt}",
+            "Trait": info.get("TRAIT", ""),
+        }
+        if samples:
+            # One record per sample, using its GT call when present
+            fmt = fields[8].split(":")
+            for sample, values in zip(samples, fields[9:]):
+                call = dict(zip(fmt, values.split(":")))
+                yield dict(row, **{"Patient ID": sample, "Genotype": call.get("GT", row["Genotype"])})
+        else:
+            yield row
+
+def read_variants(path):
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if ext == ".vcf":
+            yield from _read_vcf(f)
+        else:
+            yield from _read_delimited(f, "\t" if ext in (".tsv", ".txt") else ",")
+
+
+# ---- Encoding (runs in the worker pool) ----
+def encode_record(row):
+    metadata = {key: row[key] for key in METADATA_FIELDS if row.get(key)}
+    genetic = {key: row.get(key, "") for key in GENETIC_FIELDS}
+    if row.get("Patient ID"):
+        genetic = {"Patient ID": row["Patient ID"], **genetic}
+    # SNP_ID / Trait go back with the ciphertext so indexes never need to decrypt
+    return metadata, seal_genetic_data(genetic), {"SNP_ID": genetic["SNP_ID"], "Trait": genetic["Trait"]}
+
+def _encode_chunk(rows):
+    return [encode_record(row) for row in rows]
+
+
+# ---- Pipeline ----
+def _chunks(rows, chunk_size):
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def ingest_blocks(path, start_index=0, previous_hash="0", chunk_size=5000,
+                  workers=None, max_pending=4, progress=None, on_chunk=None, index=None):
+    progress = progress if progress is not None else IngestProgress()
+    height = start_index
+
+    def link(encoded):
+        nonlocal height, previous_hash
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for metadata, (encrypted, field_hashes, field_salt), keys in encoded:
+            block = Block.from_stored(height, timestamp, metadata, encrypted, previous_hash, None,
+                                      field_hashes, field_salt)
+            block.digest = block.calculate_digest()
+            if index is not None:
+                index.add(height, metadata, keys)
+            previous_hash = block.hash
+            height += 1
+            yield block
+        progress.records += len(encoded)
+        if on_chunk is not None:
+            on_chunk(progress)
+
+    # Chunks are linked oldest-first, so block order follows the file no
+    # matter which worker finishes first.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(read_variants(path), chunk_size):
+            pending.append(pool.submit(_encode_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from link(pending.popleft().result())
+        while pending:
+            yield from link(pending.popleft().result())
+
+
+def ingest_to_ledger(path, ledger_path, chunk_size=5000, workers=None, on_chunk=None, index=None):
+    # Appends to an existing ledger, continuing its chain from the last block.
+    # Index keys go to the ledger's .index sidecar, and into `index` if given.
+    progress = IngestProgress()
+    with LedgerFile(ledger_path, create=True) as ledger, IndexLog(ledger.index_path, index) as index_log:
+        if len(ledger):
+            last = ledger.read_block(-1)
+            start_index, previous_hash = last.index + 1, last.hash
+        else:
+            start_index, previous_hash = 0, "0"
+        blocks = ingest_blocks(path, start_index, previous_hash, chunk_size, workers, progress=progress, on_chunk=on_chunk, index=index_log)
+        for batch in _chunks(blocks, chunk_size):
+            ledger.extend(batch)
+    return progress
@@ -0,0 +1,166 @@
+import argparse
+import json
+import sys
+
+from ledger_file import DIGEST_OFFSET, HEADER, LedgerFile, VERIFY_CHUNK, verify_parallel
+
+# ==== Batch Ledger CLI ====
+# Headless entry point for scripts and cron jobs:
+#   python ledger_cli.py ingest variants.vcf ledger.gbl
+#   python ledger_cli.py verify ledger.gbl [more.gbl ...]
+#   python ledger_cli.py diff a.gbl b.gbl [c.gbl ...]
+#   python ledger_cli.py find ledger.gbl snp rs429358
+# Start-up only pays for the ledger reader and block hashing; the ingest
+# pipeline and the numpy consensus are imported by the commands that use
+# them, and nothing here touches streamlit or pandas. Every command prints
+# JSON lines; verify and diff exit with status 1 when something is wrong,
+# including a ledger path that does not exist.
+
+DIGEST_SIZE = 32
+CHUNK = 4096  # headers compared per slice in a two-way diff
+
+
+def emit(record):
+    print(json.dumps(record), flush=True)
+
+
+def first_difference(a, b):
+    # Equal header slices are skipped with one bytes comparison; only the
+    # first slice that differs is walked header by header.
+    common = min(len(a), len(b))
+    for start in range(0, common, CHUNK):
+        stop = min(start + CHUNK, common)
+        left, right = a.raw_headers(start, stop), b.raw_headers(start, stop)
+        if left == right:
+            continue
+        for n in range(stop - start):
+            offset = n * HEADER.size + DIGEST_OFFSET
+            if left[offset:offset + DIGEST_SIZE] != right[offset:offset + DIGEST_SIZE]:
+                return start + n
+    return common if len(a) != len(b) else None
+
+
+# ---- Commands ----
+def cmd_ingest(args):
+    from ingest import ingest_to_ledger
+
+    def report(progress):
+        print(progress, file=sys.stderr, flush=True)
+
+    progress = ingest_to_ledger(args.source, args.ledger, args.chunk_size, args.workers,
+                                on_chunk=report if args.progress else None)
+    with LedgerFile(args.ledger) as ledger:
+        blocks = len(ledger)
+    emit({"ledger": args.ledger, "records": progress.records, "blocks": blocks,
+          "seconds": round(progress.elapsed, 3), "records_per_second": round(progress.records_per_second, 1)})
+    return 0
+
+
+def cmd_verify(args):
+    status = 0
+    for path in args.ledgers:
+        try:
+            with LedgerFile(path) as ledger:
+                blocks = len(ledger)
+        except FileNotFoundError as error:
+            emit({"ledger": path, "valid": False, "error": str(error)})
+            status = 1
+            continue
+        first_bad = verify_parallel(path, args.start, args.stop, args.workers, args.chunk_size)
+        emit({"ledger": path, "blocks": blocks, "valid": first_bad is None, "first_bad": first_bad})
+        if first_bad is not None:
+            status = 1
+    return status
+
+
+def cmd_diff(args):
+    ledgers = {}
+    try:
+        for path in args.ledgers:
+            ledgers[path] = LedgerFile(path)
+    except FileNotFoundError as error:
+        emit({"ledgers": args.ledgers, "error": str(error)})
+        for ledger in ledgers.values():
+            ledger.close()
+        return 1
+    try:
+        if len(ledgers) == 2 and not args.majority:
+            a, b = ledgers.values()
+            height = first_difference(a, b)
+            emit({"ledgers": args.ledgers, "blocks": [len(a), len(b)], "first_divergence": height})
+            return 0 if height is None else 1
+
+        from consensus import DigestMatrix
+        result = DigestMatrix.from_ledgers(ledgers).consensus()
+        height = result.first_divergent_height()
+        emit({
+            "ledgers": args.ledgers,
+            "blocks": [len(ledger) for ledger in ledgers.values()],
+            "first_divergent_height": height,
+            "minority": result.minority_servers(height) if height is not None else [],
+            "first_divergence": result.first_divergence(),
+        })
+        return 0 if height is None else 1
+    finally:
+        for ledger in ledgers.values():
+            ledger.close()
+
+
+def cmd_find(args):
+    # Served from the .index sidecar written by ingest; a ledger without a
+    # complete one is indexed by decrypting every block.
+    from indexes import ChainIndex, load_index
+
+    try:
+        ledger = LedgerFile(args.ledger)
+    except FileNotFoundError as error:
+        emit({"ledger": args.ledger, "error": str(error)})
+        return 1
+    with ledger:
+        index = load_index(ledger.index_path, len(ledger))
+        from_sidecar = index is not None and len(index) == len(ledger)
+        if not from_sidecar:
+            index = ChainIndex.from_chain(ledger)
+        emit({"ledger": args.ledger, "field": args.field, "value": args.value,
+              "heights": index.lookup(args.field, args.value), "from_index_file": from_sidecar})
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ledger_cli.py", description="Ingest, verify, diff and search GeneBlock ledgers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="append a CSV/TSV/VCF variant file to a ledger")
+    ingest.add_argument("source")
+    ingest.add_argument("ledger")
+    ingest.add_argument("--chunk-size", type=int, default=5000)
+    ingest.add_argument("--workers", type=int)
+    ingest.add_argument("--progress", action="store_true", help="report progress on stderr")
+    ingest.set_defaults(run=cmd_ingest)
+
+    verify = commands.add_parser("verify", help="re-hash ledgers and check every link")
+    verify.add_argument("ledgers", nargs="+")
+    verify.add_argument("--start", type=int, default=0)
+    verify.add_argument("--stop", type=int)
+    verify.add_argument("--workers", type=int, help="processes re-hashing ranges in parallel (default: one per core)")
+    verify.add_argument("--chunk-size", type=int, default=VERIFY_CHUNK, help="blocks per range")
+    verify.set_defaults(run=cmd_verify)
+
+    diff = commands.add_parser("diff", help="find where ledgers stop agreeing")
+    diff.add_argument("ledgers", nargs="+")
+    diff.add_argument("--majority", action="store_true",
+                      help="majority vote even for two ledgers (always used for three or more)")
+    diff.set_defaults(run=cmd_diff)
+
+    find = commands.add_parser("find", help="list the heights of blocks with a metadata or SNP value")
+    find.add_argument("ledger")
+    find.add_argument("field", choices=["patient", "sample", "snp", "trait"])
+    find.add_argument("value")
+    find.set_defaults(run=cmd_find)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+
+from blockchain import Block
+from serialization import GENESIS_DIGEST
+
+# ==== Append-Only Ledger File ====
+# Two files per ledger:
+#   <path>          magic + one fixed-size header per block
+#   <path>.payload  canonical field encoding of each block (metadata, encrypted
+#                   genetic data and its salted per-field leaf hashes)
+# Both are only ever appended to. Readers memory-map them, so block N is read
+# by slicing header N and its payload without touching the rest of the chain.
+
+MAGIC = b"GBLEDG02"
+HEADER = struct.Struct("<Qq32s32sQI")  # index, timestamp, prev digest, digest, payload offset, payload length
+DIGEST_OFFSET = struct.calcsize("<Qq32s")  # where the block digest sits inside a header
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _encode_timestamp(timestamp):
+    return int((datetime.strptime(timestamp, TIMESTAMP_FORMAT) - _EPOCH).total_seconds())
+
+def _decode_timestamp(seconds):
+    return (_EPOCH + timedelta(seconds=seconds)).strftime(TIMESTAMP_FORMAT)
+
+
+
+class LedgerFile:
+    def __init__(self, path, create=False):
+        self.path = path
+        self.payload_path = path + ".payload"
+        self.index_path = path + ".index"  # written by ingest, see indexes.IndexLog
+        if not os.path.exists(path):
+            if not create:
+                raise FileNotFoundError(f"no ledger at {path}")
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+            open(self.payload_path, "wb").close()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a GeneBlock ledger file")
+        self._headers = None
+        self._payloads = None
+        self._count = (os.path.getsize(path) - len(MAGIC)) // HEADER.size
+        self._payload_size = os.path.getsize(self.payload_path) if os.path.exists(self.payload_path) else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        for view in (self._headers, self._payloads):
+            if view is not None:
+                view.close()
+        self._headers = self._payloads = None
+
+    # ---- Writing ----
+    def append(self, block):
+        self.extend([block])
+
+    def _trim_torn_tail(self):
+        # A crash mid-append can leave part of a header, or payload bytes no
+        # header points to yet. Readers ignore both (the block count rounds
+        # down); before appending they are cut off so new headers stay aligned.
+        self.close()
+        self._count = (os.path.getsize(self.path) - len(MAGIC)) // HEADER.size
+        header_end = len(MAGIC) + self._count * HEADER.size
+        payload_end = 0
+        if self._count:
+            with open(self.path, "rb") as f:
+                f.seek(header_end - HEADER.size)
+                *_, offset, length = HEADER.unpack(f.read(HEADER.size))
+            payload_end = offset + length
+        payload_size = os.path.getsize(self.payload_path) if os.path.exists(self.payload_path) else 0
+        if payload_size < payload_end:
+            raise ValueError(f"{self.payload_path} is missing data for existing blocks; refusing to append")
+        if os.path.getsize(self.path) > header_end:
+            os.truncate(self.path, header_end)
+        if payload_size > payload_end:
+            os.truncate(self.payload_path, payload_end)
+        self._payload_size = payload_end
+
+    def extend(self, blocks):
+        self._trim_torn_tail()
+        headers = bytearray()
+        payloads = bytearray()
+        count = self._count
+        for block in blocks:
+            payload = block.field_bytes()
+            headers += HEADER.pack(
+                block.index,
+                _encode_timestamp(block.timestamp),
+                block.previous_digest,
+                block.digest,
+                self._payload_size + len(payloads),
+                len(payload),
+            )
+            payloads += payload
+            count += 1
+        # Payload goes down first so a header never points past the payload file
+        with open(self.payload_path, "ab") as f:
+            f.write(payloads)
+        with open(self.path, "ab") as f:
+            f.write(headers)
+        self._payload_size += len(payloads)
+        self._count = count
+        self.close()  # remap on next read
+
+    # ---- Reading ----
+    def _map(self):
+        if self._headers is None:
+            with open(self.path, "rb") as f:
+                self._headers = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._payload_size:
+                with open(self.payload_path, "rb") as f:
+                    self._payloads = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._headers, self._payloads
+
+    def header(self, n):
+        if n < 0:
+            n += self._count
+        if not 0 <= n < self._count:
+            raise IndexError("ledger index out of range")
+        headers, _ = self._map()
+        return HEADER.unpack_from(headers, len(MAGIC) + n * HEADER.size)
+
+    def raw_headers(self, start=0, stop=None):
+        # Packed HEADER records for [start, stop), straight from the map
+        stop = self._count if stop is None else min(stop, self._count)
+        headers, _ = self._map()
+        return headers[len(MAGIC) + start * HEADER.size:len(MAGIC) + stop * HEADER.size]
+
+    def read_block(self, n):
+        return self._block_from_header(self.header(n))
+
+    def _block_from_header(self, header):
+        index, seconds, prev_digest, digest, offset, length = header
+        _, payloads = self._map()
+        return Block.from_canonical(
+            index, _decode_timestamp(seconds), payloads[offset:offset + length], prev_digest, digest,
+        )
+
+    def __getitem__(self, n):
+        return self.read_block(n)
+
+    def __iter__(self):
+        for n in range(self._count):
+            yield self.read_block(n)
+
+    # ---- Verification ----
+    def verify(self, start=0, stop=None):
+        # Streaming pass: one block in memory at a time. Returns the first bad
+        # height in [start, stop) or None if every block and link checks out.
+        stop = self._count if stop is None else min(stop, self._count)
+        prev_digest = self.header(start - 1)[3] if start > 0 else GENESIS_DIGEST
+        for n in range(start, stop):
+            header = self.header(n)
+            _, _, stored_prev, digest, offset, length = header
+            if stored_prev != prev_digest or offset + length > self._payload_size:
+                return n  # broken link, or payload missing from the payload file
+            try:
+                block = self._block_from_header(header)
+            except ValueError:
+                return n  # payload no longer decodes
+            if block.calculate_digest() != digest:
+                return n
+            prev_digest = digest
+        return None
+
+
+# ---- Parallel Verification ----
+# Each block's digest is recomputed independently, and verify(start, stop)
+# already checks the link into `start` against the stored digest before it,
+# so a ledger splits into ranges with nothing to stitch at the boundaries.
+# Workers map the same files (the page cache is shared) and return the first
+# bad height in their range; the earliest one wins. Ranges are handed out in
+# order, so once a range fails the ranges after it are cancelled.
+VERIFY_CHUNK = 65536  # blocks per range
+
+
+def _verify_range(path, start, stop):
+    with LedgerFile(path) as ledger:
+        return ledger.verify(start, stop)
+
+def verify_parallel(path, start=0, stop=None, workers=None, chunk_size=VERIFY_CHUNK):
+    with LedgerFile(path) as ledger:
+        stop = len(ledger) if stop is None else min(stop, len(ledger))
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or stop - start <= chunk_size:
+            return ledger.verify(start, stop)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = [(lo, min(lo + chunk_size, stop)) for lo in range(start, stop, chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_verify_range, path, lo, hi) for lo, hi in ranges]
+        for future in futures:
+            first_bad = future.result()
+            if first_bad is not None:
+                for later in futures:
+                    later.cancel()
+                return first_bad
+    return None
+
+
+def save_chain(chain, path):
+    with LedgerFile(path, create=True) as ledger:
+        ledger.extend(chain[len(ledger):])
+        return len(ledger)
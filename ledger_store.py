@@ -0,0 +1,201 @@
+import copy
+import threading
+
+from checkpoints import MountainRange, OverlayRange, first_divergence
+from indexes import ChainIndex, index_keys, parse_genetic
+from replica import Replica, digest_at, make_replicas
+from serialization import GENESIS_DIGEST
+from verification import ChainVerifier
+
+# ==== Process-Level Ledger Store ====
+# Built once per process (the apps wrap it in st.cache_resource) and shared by
+# every session, so reruns reuse the same hashed chain instead of rebuilding it
+# with fresh timestamps. All tampering goes through the mutation methods below,
+# which only touch the edited blocks and tell the verifier what changed.
+# Sessions share the store, so UIs read it through the locked methods here
+# (snapshot() for rendering) rather than the live replicas or the verifier.
+# Subscribers (e.g. the decrypted payload cache) are told about block digests
+# that no longer exist anywhere once a replica's private copy is rehashed or
+# dropped.
+
+
+class LedgerStore:
+    def __init__(self, build_chain, labels, index=None):
+        # `index`: a ChainIndex filled while the chain was built; without one
+        # every block is decrypted to index it
+        self._lock = threading.RLock()
+        self.chain = build_chain()
+        self.servers = make_replicas(self.chain, labels)
+        self.verifier = ChainVerifier(self.servers)
+        self.index = index if index is not None else ChainIndex.from_chain(self.chain)
+        self.checkpoints = MountainRange.from_chain(self.chain)
+        self.replica_checkpoints = {label: OverlayRange(self.checkpoints) for label in labels}
+        self._listeners = []
+
+    def subscribe(self, callback):
+        # callback(digest) for every retired block digest
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _retire(self, height, digest):
+        # The canonical block at this height keeps its digest alive
+        if not self._listeners or (height < len(self.chain) and digest_at(self.chain, height) == digest):
+            return
+        for callback in self._listeners:
+            callback(digest)
+
+    def append(self, block, genetic=None):
+        # Replicas read through to the canonical chain, so they see it at once
+        with self._lock:
+            self.chain.append(block)
+            self.checkpoints.append(block.digest)
+            for overlay in self.replica_checkpoints.values():
+                overlay.refresh()
+            self.index.add(len(self.chain) - 1, block.metadata,
+                           genetic if genetic is not None else parse_genetic(block.genetic_data))
+            return block
+
+    # ---- Locked reads ----
+    def snapshot(self):
+        # (canonical chain, {label: replica}) frozen at this moment, for rendering
+        with self._lock:
+            chain = Replica(self.chain)
+            chain.truncate(len(self.chain))
+            return chain, {label: replica.snapshot() for label, replica in self.servers.items()}
+
+    def __len__(self):
+        with self._lock:
+            return len(self.chain)
+
+    def block(self, index, label=None):
+        # A copy of the block at `index` on a server, or on the canonical chain
+        with self._lock:
+            return copy.copy((self.chain if label is None else self.servers[label])[index])
+
+    def majority_hash(self, index):
+        with self._lock:
+            return self.verifier.majority_hash(index)
+
+    def is_chain_valid(self, label):
+        with self._lock:
+            return self.verifier.is_chain_valid(label)
+
+    def first_divergences(self):
+        # label -> first height where that server disagrees with the majority
+        with self._lock:
+            return {label: self.verifier.first_divergence(label) for label in self.servers}
+
+    def lookup(self, field, value, label=None):
+        # Canonical index hits, corrected for the few blocks a replica holds
+        # tampered copies of (only those get re-read).
+        with self._lock:
+            heights = set(self.index.lookup(field, value))
+            if label is not None:
+                replica = self.servers[label]
+                for height in replica.divergent():
+                    if height >= len(replica):
+                        heights.discard(height)  # deleted on this server
+                        continue
+                    block = replica[height]
+                    genetic = parse_genetic(block.genetic_data) if field in ("snp", "trait") else None
+                    if index_keys(block.metadata, genetic)[field] == value:
+                        heights.add(height)
+                    else:
+                        heights.discard(height)
+            return sorted(heights)
+
+    def divergent_heights(self):
+        # label -> heights where that server disagrees with the majority. Only
+        # heights some replica holds a private copy of can disagree at all.
+        with self._lock:
+            candidates = sorted(set().union(*(replica.divergent() for replica in self.servers.values())))
+            result = {label: [] for label in self.servers}
+            for height in candidates:
+                majority = self.verifier.majority_digest(height)
+                for label, replica in self.servers.items():
+                    digest = replica.digest_at(height) if height < len(replica) else None
+                    if digest != majority:
+                        result[label].append(height)
+            return result
+
+    def first_divergence(self, label, other=None):
+        # O(log n) bisection over checkpoint digests; `other` defaults to the canonical chain
+        with self._lock:
+            theirs = self.checkpoints if other is None else self.replica_checkpoints[other]
+            height, _ = first_divergence(self.replica_checkpoints[label], theirs)
+            return height
+
+    def _rehash_forward(self, label, start):
+        replica = self.servers[label]
+        for i in range(start, len(replica)):
+            block = replica.own(i)
+            retired = block.digest
+            block.previous_digest = replica.digest_at(i - 1) if i > 0 else GENESIS_DIGEST
+            block.digest = block.calculate_digest()
+            self.replica_checkpoints[label].update(i, block.digest)
+            if block.digest != retired:
+                self._retire(i, retired)
+
+    def edit_metadata(self, label, index, updates, propagate=True):
+        with self._lock:
+            replica = self.servers[label]
+            block = replica.own(index)
+            retired = block.digest
+            block.update_metadata(updates)
+            block.digest = block.calculate_digest()
+            self._retire(index, retired)
+            self.replica_checkpoints[label].update(index, block.digest)
+            if propagate:
+                self._rehash_forward(label, index + 1)
+            self.verifier.invalidate(index)
+            return copy.copy(block)
+
+    def replace_genetic_data(self, label, index, genetic_data, propagate=False):
+        with self._lock:
+            replica = self.servers[label]
+            block = replica.own(index)
+            retired = block.digest
+            block.set_genetic_data(genetic_data)
+            block.digest = block.calculate_digest()
+            self._retire(index, retired)
+            self.replica_checkpoints[label].update(index, block.digest)
+            if propagate:
+                self._rehash_forward(label, index + 1)
+            self.verifier.invalidate(index)
+            return copy.copy(block)
+
+    def delete_block(self, label, index, propagate=True):
+        # Later blocks move down one height; with propagate they are relinked
+        # and rehashed so the gap does not show in the server's own links.
+        with self._lock:
+            replica = self.servers[label]
+            self._retire(index, replica.digest_at(index))
+            shifted = [replica[i] for i in range(index + 1, len(replica))]
+            replica.truncate(len(replica) - 1)
+            self.replica_checkpoints[label].truncate(len(replica))
+            for height, block in enumerate(shifted, index):
+                block = copy.copy(block)
+                block.index = height
+                replica.put(height, block)
+                self.replica_checkpoints[label].update(height, block.digest)
+            if propagate:
+                self._rehash_forward(label, index)
+            self.verifier.invalidate(index)
+
+    def restore(self, label=None):
+        # Drop tampered copies so the replica(s) share the canonical chain again.
+        with self._lock:
+            labels = [label] if label is not None else list(self.servers)
+            first = None
+            for name in labels:
+                replica = self.servers[name]
+                divergent = replica.divergent()
+                if divergent:
+                    first = divergent[0] if first is None else min(first, divergent[0])
+                for height in divergent:
+                    if height < len(replica):
+                        self._retire(height, replica.digest_at(height))
+                replica.reset()
+                self.replica_checkpoints[name].reset()
+            if first is not None:
+                self.verifier.invalidate(first)
@@ -0,0 +1,71 @@
+import hashlib
+
+from serialization import pack_bytes, pack_str
+
+# ==== Merkle Tree over Block Fields ====
+# Leaves and inner nodes use different prefixes so a leaf can never be passed
+# off as a node. An odd node at the end of a level is carried up unchanged.
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(name, value, salt=b""):
+    packed_value = pack_bytes(value) if isinstance(value, bytes) else pack_str(value)
+    return hashlib.sha256(LEAF_PREFIX + pack_bytes(salt) + pack_str(name) + packed_value).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves):
+    # levels[0] are the leaves, levels[-1] == [root]
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parent = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parent.append(level[-1])
+        levels.append(parent)
+    return levels
+
+def merkle_root(leaves):
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    return build_levels(leaves)[-1][0]
+
+
+def inclusion_proof(leaves, position):
+    # Sibling hashes from the leaf up; None where a node was carried up alone
+    proof = []
+    for level in build_levels(leaves)[:-1]:
+        sibling = position ^ 1
+        proof.append(level[sibling] if sibling < len(level) else None)
+        position //= 2
+    return proof
+
+def verify_proof(leaf, position, proof, root):
+    node = leaf
+    for sibling in proof:
+        if sibling is not None:
+            node = node_hash(sibling, node) if position % 2 else node_hash(node, sibling)
+        position //= 2
+    return node == root
+
+
+def diff_leaves(leaves_a, leaves_b):
+    # Positions of differing leaves, found by descending only into subtrees
+    # whose hashes differ. Both trees must have the same shape.
+    if len(leaves_a) != len(leaves_b):
+        raise ValueError("Merkle trees have different numbers of leaves")
+    levels_a, levels_b = build_levels(leaves_a), build_levels(leaves_b)
+    frontier = [0] if levels_a[-1] != levels_b[-1] else []
+    for depth in range(len(levels_a) - 1, 0, -1):
+        below_a, below_b = levels_a[depth - 1], levels_b[depth - 1]
+        children = []
+        for node in frontier:
+            for child in (2 * node, 2 * node + 1):
+                if child < len(below_a) and below_a[child] != below_b[child]:
+                    children.append(child)
+        frontier = children
+    return frontier
@@ -0,0 +1,310 @@
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+from blockchain import Block, build_chain
+from checkpoints import MountainRange
+from serialization import GENESIS_DIGEST
+
+# ==== Asyncio Replica Network Simulator ====
+# Every server is an independent node task with its own ledger, its own
+# checkpoint range and an inbox queue. The in-process network delays messages
+# by a random latency and drops a configurable share of them.
+#
+# Nodes gossip HEAD(length, checkpoint root) to random peers. A node behind a
+# peer, or outvoted by peers at its own length, finds the first divergent
+# height by bisecting the peer's checkpoint digests (one round trip per
+# level), then pulls only [divergence, peer length) in batches. Pulled blocks
+# are rebuilt from their canonical bytes and re-verified before they are
+# written.
+
+
+class Network:
+    def __init__(self, latency=(0.001, 0.005), loss=0.0, seed=None):
+        self.latency = latency
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.nodes = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def register(self, node):
+        self.nodes[node.name] = node
+
+    def send(self, sender, recipient, message):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.rng.uniform(*self.latency)
+        inbox = self.nodes[recipient].inbox
+        asyncio.get_running_loop().call_later(delay, inbox.put_nowait, (sender, message))
+
+
+def encode_block(block):
+    return (block.index, block.timestamp, block.field_bytes(), block.previous_digest, block.digest)
+
+def decode_block(record):
+    index, timestamp, field_bytes, previous_digest, digest = record
+    return Block.from_canonical(index, timestamp, field_bytes, previous_digest, digest)
+
+
+class Node:
+    def __init__(self, name, network, chain=(), gossip_interval=0.01, fanout=2,
+                 batch=64, request_timeout=0.1, retries=5, seed=None):
+        self.name = name
+        self.network = network
+        self.chain = []
+        self.checkpoints = MountainRange()
+        for block in chain:
+            self._write(len(self.chain), block)
+        self.inbox = asyncio.Queue()
+        self.gossip_interval = gossip_interval
+        self.fanout = fanout
+        self.batch = batch
+        self.request_timeout = request_timeout
+        self.retries = retries
+        self.rng = random.Random(seed)
+        self.peer_heads = {}
+        self._pending = {}
+        self._request_ids = itertools.count()
+        self._syncing = False
+        self.blocks_received = 0
+        self.repairs = 0
+        self.detected_at = None
+        network.register(self)
+
+    # ---- Local ledger ----
+    def _write(self, index, block):
+        if index < len(self.chain):
+            self.chain[index] = block
+            self.checkpoints.update(index, block.digest)
+        else:
+            self.chain.append(block)
+            self.checkpoints.append(block.digest)
+
+    def root(self):
+        return self.checkpoints.root() if self.chain else b""
+
+    def tamper(self, index, updates):
+        # Local edit with the forward rehash the UI tamper path does
+        block = self.chain[index]
+        block.update_metadata(updates)
+        block.digest = block.calculate_digest()
+        self.checkpoints.update(index, block.digest)
+        for i in range(index + 1, len(self.chain)):
+            self.chain[i].previous_digest = self.chain[i - 1].digest
+            self.chain[i].digest = self.chain[i].calculate_digest()
+            self.checkpoints.update(i, self.chain[i].digest)
+
+    def in_minority(self):
+        # Outvoted at our own length by a root that a strict majority of the
+        # whole network reported, so a couple of stale heads cannot flip us
+        length, root = len(self.chain), self.root()
+        votes = {root: 1}
+        for peer_length, peer_root in self.peer_heads.values():
+            if peer_length == length:
+                votes[peer_root] = votes.get(peer_root, 0) + 1
+        winner = max(votes, key=votes.get)
+        return winner != root and votes[winner] * 2 > len(self.network.nodes)
+
+    # ---- Tasks ----
+    async def run(self):
+        await asyncio.gather(self._gossip(), self._receive())
+
+    async def _gossip(self):
+        while True:
+            peers = [name for name in self.network.nodes if name != self.name]
+            for peer in self.rng.sample(peers, min(self.fanout, len(peers))):
+                self.network.send(self.name, peer, ("HEAD", len(self.chain), self.root()))
+            await asyncio.sleep(self.gossip_interval)
+
+    async def _receive(self):
+        while True:
+            sender, message = await self.inbox.get()
+            kind = message[0]
+            if kind == "HEAD":
+                self.peer_heads[sender] = (message[1], message[2])
+                self._maybe_sync(sender, message[1], message[2])
+            elif kind == "NODES_REQ":
+                _, request_id, positions = message
+                digests = [self.checkpoints.node(level, pos) for level, pos in positions]
+                self.network.send(self.name, sender, ("RESP", request_id, digests))
+            elif kind == "BLOCKS_REQ":
+                _, request_id, start, stop = message
+                records = [encode_block(block) for block in self.chain[start:stop]]
+                self.network.send(self.name, sender, ("RESP", request_id, records))
+            elif kind == "RESP":
+                future = self._pending.pop(message[1], None)
+                if future is not None and not future.done():
+                    future.set_result(message[2])
+
+    def _maybe_sync(self, peer, peer_length, peer_root):
+        if self._syncing:
+            return
+        behind = peer_length > len(self.chain)
+        outvoted = peer_length == len(self.chain) and peer_root != self.root() and self.in_minority()
+        if behind or outvoted:
+            if outvoted and self.detected_at is None:
+                self.detected_at = time.perf_counter()
+            self._syncing = True
+            asyncio.get_running_loop().create_task(self._sync_with(peer, peer_length, peer_root))
+
+    async def _request(self, peer, *message):
+        for _ in range(self.retries):
+            request_id = next(self._request_ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            self.network.send(self.name, peer, (message[0], request_id) + message[1:])
+            try:
+                return await asyncio.wait_for(future, self.request_timeout)
+            except asyncio.TimeoutError:
+                self._pending.pop(request_id, None)
+        raise ConnectionError(f"{peer} did not answer {message[0]}")
+
+    async def _remote_divergence(self, peer, length):
+        # Same walk as checkpoints.first_divergence, one round trip per step
+        peaks = self.checkpoints.peaks(length)
+        theirs = await self._request(peer, "NODES_REQ", peaks)
+        for (level, position), digest in zip(peaks, theirs):
+            if self.checkpoints.node(level, position) != digest:
+                while level > 0:
+                    level -= 1
+                    position *= 2
+                    (left,) = await self._request(peer, "NODES_REQ", [(level, position)])
+                    if self.checkpoints.node(level, position) == left:
+                        position += 1
+                return position
+        return None
+
+    async def _sync_with(self, peer, peer_length, peer_root):
+        try:
+            common = min(len(self.chain), peer_length)
+            start = await self._remote_divergence(peer, common) if common else None
+            if start is None:
+                start = common
+            elif not self.in_minority():
+                return  # the peer is the odd one out; it will repair itself
+            else:
+                self.repairs += 1
+            for lo in range(start, peer_length, self.batch):
+                records = await self._request(peer, "BLOCKS_REQ", lo, min(lo + self.batch, peer_length))
+                for record in records:
+                    block = decode_block(record)
+                    expected_prev = self.chain[block.index - 1].digest if block.index > 0 else GENESIS_DIGEST
+                    if block.previous_digest != expected_prev or block.calculate_digest() != block.digest:
+                        return  # peer changed underneath us; try again on the next HEAD
+                    self._write(block.index, block)
+                    self.blocks_received += 1
+        except ConnectionError:
+            pass
+        finally:
+            self._syncing = False
+
+
+# ==== Simulation Driver ====
+def make_chain(length):
+    records = (
+        ({"Patient ID": f"P{i:06d}", "Test Date": "2023-08-01", "Sample Code": f"S{i}"},
+         {"SNP_ID": f"rs{1000 + i}", "Chromosome": str(i % 22 + 1), "Position": str(10000 + i),
+          "Genotype": "A/G", "Trait": "Simulated"})
+        for i in range(length)
+    )
+    return build_chain(records, "2023-08-01 00:00:00")
+
+
+async def _wait_until(condition, timeout, poll=0.005):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(poll)
+    return True
+
+
+def max_tampered(nodes):
+    # Repair needs a strict honest majority, and Server 1 (the origin) stays honest
+    return (nodes - 1) // 2
+
+
+def check_config(nodes, blocks, tampered):
+    if nodes < 1 or blocks < 1:
+        raise ValueError(f"need at least one node and one block (nodes={nodes}, blocks={blocks})")
+    if tampered < 0:
+        raise ValueError(f"tampered must not be negative (got {tampered})")
+    if tampered and max_tampered(nodes) < 1:
+        raise ValueError(f"tampering needs at least 3 nodes so an honest majority can repair it (nodes={nodes})")
+
+
+async def simulate(nodes=5, blocks=500, tampered=1, latency=(0.001, 0.005), loss=0.0,
+                   gossip_interval=0.01, fanout=2, batch=64, timeout=30.0, seed=0):
+    # More tampered nodes than max_tampered(nodes) are capped to it; the
+    # report gives both the requested and the actual count.
+    check_config(nodes, blocks, tampered)
+    rng = random.Random(seed)
+    network = Network(latency, loss, seed)
+    origin = make_chain(blocks)
+    members = [Node("Server 1", network, origin, gossip_interval, fanout, batch, seed=rng.random())]
+    members += [Node(f"Server {n}", network, (), gossip_interval, fanout, batch, seed=rng.random())
+                for n in range(2, nodes + 1)]
+    tasks = [asyncio.get_running_loop().create_task(node.run()) for node in members]
+
+    def agreed():
+        roots = {node.root() for node in members}
+        return len(roots) == 1 and all(len(node.chain) == blocks for node in members)
+
+    report = {"nodes": nodes, "blocks": blocks, "latency": list(latency), "loss": loss,
+              "tampered_requested": tampered, "tampered": 0}
+    try:
+        started = time.perf_counter()
+        synced = await _wait_until(agreed, timeout)
+        elapsed = time.perf_counter() - started
+        replicated = sum(node.blocks_received for node in members)
+        report.update(replicated=synced, replication_seconds=elapsed,
+                      blocks_replicated=replicated, blocks_per_second=replicated / elapsed if elapsed else 0.0)
+
+        if synced and tampered:
+            victims = rng.sample(members[1:], min(tampered, max_tampered(nodes)))
+            height = rng.randrange(blocks)
+            received_before = sum(node.blocks_received for node in members)
+            tampered_at = time.perf_counter()
+            for victim in victims:
+                victim.tamper(height, {"Patient ID": "HACKED"})
+            repaired = await _wait_until(agreed, timeout)
+            detections = [node.detected_at for node in victims if node.detected_at is not None]
+            report.update(
+                tampered=len(victims),
+                tampered_nodes=[node.name for node in victims],
+                tampered_height=height,
+                detected=bool(detections),
+                seconds_to_detect=(min(detections) - tampered_at) if detections else None,
+                repaired=repaired,
+                seconds_to_repair=(time.perf_counter() - tampered_at) if repaired else None,
+                blocks_pulled_for_repair=sum(node.blocks_received for node in members) - received_before,
+            )
+        report.update(messages_sent=network.sent, messages_dropped=network.dropped)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return report
+
+
+def run_simulation(**options):
+    return asyncio.run(simulate(**options))
+
+
+if __name__ == "__main__":
+    # e.g. python network_sim.py nodes=7 blocks=2000 tampered=2 loss=0.05
+    options = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split("=", 1)
+        options[key] = float(value) if "." in value else int(value)
+    try:
+        report = run_simulation(**options)
+    except ValueError as error:
+        sys.exit(f"network_sim: {error}")
+    print(json.dumps(report, indent=2))
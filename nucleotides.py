@@ -0,0 +1,175 @@
+import hashlib
+import struct
+
+import numpy as np
+
+from serialization import PACKED_SEQUENCE_MAGIC
+
+# ==== 2-Bit Packed Nucleotide Sequences ====
+# A, C, G and T take two bits each, four bases per byte, first base in the
+# high bits. Soft-masked (lowercase) stretches are packed upper-cased and
+# recorded as (start, length) case runs. Anything else (N and the other IUPAC
+# ambiguity codes, gaps) is packed as A and recorded as a run of
+# (start, length, character) in an escape table, so unpacking gives back the
+# exact input. Real reads have few, clustered ambiguous bases and long masked
+# stretches, so both tables stay tiny.
+#
+# Serialized form: MAGIC, header (bases, escape runs, case runs), packed
+# bytes, escape starts, lengths and characters, case starts and lengths. The
+# leading zero byte in MAGIC can never start a text payload, which is how an
+# encrypted payload is told apart from text.
+
+MAGIC = PACKED_SEQUENCE_MAGIC
+_HEADER = struct.Struct("<QII")  # bases, escape runs, case runs
+
+BASES = b"ACGT"
+_CODES = np.full(256, 255, dtype=np.uint8)
+_CODES[np.frombuffer(BASES, dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+_LETTERS = np.frombuffer(BASES, dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+_NO_RUNS = np.zeros(0, dtype=np.uint32)
+
+
+class PackedSequence:
+    __slots__ = ("length", "packed", "run_starts", "run_lengths", "run_codes", "case_starts", "case_lengths")
+
+    def __init__(self, length, packed, run_starts=None, run_lengths=None, run_codes=b"",
+                 case_starts=None, case_lengths=None):
+        self.length = length
+        self.packed = packed  # uint8 array, ceil(length / 4) bytes
+        self.run_starts = run_starts if run_starts is not None else _NO_RUNS
+        self.run_lengths = run_lengths if run_lengths is not None else _NO_RUNS
+        self.run_codes = run_codes
+        self.case_starts = case_starts if case_starts is not None else _NO_RUNS
+        self.case_lengths = case_lengths if case_lengths is not None else _NO_RUNS
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return unpack(self)
+
+    def __repr__(self):
+        return (f"PackedSequence({self.length} bases, {len(self.run_codes)} escape runs, "
+                f"{len(self.case_starts)} lowercase runs)")
+
+    def __eq__(self, other):
+        return isinstance(other, PackedSequence) and self.to_bytes() == other.to_bytes()
+
+    def __hash__(self):
+        return hash(self.to_bytes())
+
+    def to_bytes(self):
+        return b"".join([
+            MAGIC,
+            _HEADER.pack(self.length, len(self.run_codes), len(self.case_starts)),
+            self.packed.tobytes(),
+            self.run_starts.astype("<u4").tobytes(),
+            self.run_lengths.astype("<u4").tobytes(),
+            self.run_codes,
+            self.case_starts.astype("<u4").tobytes(),
+            self.case_lengths.astype("<u4").tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a packed nucleotide sequence")
+        length, runs, case_runs = _HEADER.unpack_from(data, len(MAGIC))
+        offset = len(MAGIC) + _HEADER.size
+        size = (length + 3) // 4
+        if len(data) != offset + size + 9 * runs + 8 * case_runs:
+            raise ValueError("truncated packed nucleotide sequence")
+        packed = np.frombuffer(data, dtype=np.uint8, count=size, offset=offset)
+        offset += size
+        starts = np.frombuffer(data, dtype="<u4", count=runs, offset=offset).astype(np.uint32)
+        offset += 4 * runs
+        lengths = np.frombuffer(data, dtype="<u4", count=runs, offset=offset).astype(np.uint32)
+        offset += 4 * runs
+        codes = bytes(data[offset:offset + runs])
+        offset += runs
+        case_starts = np.frombuffer(data, dtype="<u4", count=case_runs, offset=offset).astype(np.uint32)
+        offset += 4 * case_runs
+        case_lengths = np.frombuffer(data, dtype="<u4", count=case_runs, offset=offset).astype(np.uint32)
+        return cls(length, packed, starts, lengths, codes, case_starts, case_lengths)
+
+    def digest(self):
+        # SHA-256 over the packed form: a quarter of the bytes of the text
+        return hashlib.sha256(self.to_bytes()).digest()
+
+
+def is_packed(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+# ---- Codec ----
+def _pack_codes(codes):
+    # codes: uint8 array of 2-bit values, one per base
+    length = len(codes)
+    padded = np.zeros((length + 3) // 4 * 4, dtype=np.uint8)
+    padded[:length] = codes
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+
+def _runs(positions):
+    # (starts, lengths) of the stretches of consecutive positions
+    breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(positions)]))
+    return positions[starts].astype(np.uint32), (ends - starts).astype(np.uint32)
+
+def pack(sequence):
+    raw = np.frombuffer(sequence.encode("ascii") if isinstance(sequence, str) else bytes(sequence), dtype=np.uint8)
+    lower = np.flatnonzero((raw >= ord("a")) & (raw <= ord("z")))
+    case_starts = case_lengths = None
+    if len(lower):
+        case_starts, case_lengths = _runs(lower)
+        raw = raw.copy()
+        raw[lower] -= 32
+    codes = _CODES[raw]
+    escaped = np.flatnonzero(codes == 255)
+    if not len(escaped):
+        return PackedSequence(len(raw), _pack_codes(codes), case_starts=case_starts, case_lengths=case_lengths)
+
+    # Group escaped positions into runs of the same character
+    letters = raw[escaped]
+    breaks = np.flatnonzero((np.diff(escaped) != 1) | (letters[1:] != letters[:-1])) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(escaped)]))
+    codes = codes.copy()
+    codes[escaped] = 0
+    return PackedSequence(
+        len(raw), _pack_codes(codes),
+        escaped[starts].astype(np.uint32), (ends - starts).astype(np.uint32), letters[starts].tobytes(),
+        case_starts, case_lengths,
+    )
+
+def unpack_bytes(packed_sequence):
+    codes = ((packed_sequence.packed[:, None] >> _SHIFTS) & 3).reshape(-1)[:packed_sequence.length]
+    letters = _LETTERS[codes]
+    for start, run, code in zip(packed_sequence.run_starts.tolist(), packed_sequence.run_lengths.tolist(),
+                                packed_sequence.run_codes):
+        letters[start:start + run] = code
+    for start, run in zip(packed_sequence.case_starts.tolist(), packed_sequence.case_lengths.tolist()):
+        letters[start:start + run] |= 0x20
+    return letters.tobytes()
+
+def unpack(packed_sequence):
+    return unpack_bytes(packed_sequence).decode("ascii")
+
+
+# ---- Random Sequences ----
+# Uniform random bases are uniform random bytes once packed, so whole
+# sequences are drawn a byte (four bases) at a time.
+def random_packed(count, length, seed=None):
+    rng = np.random.default_rng(seed)
+    size = (length + 3) // 4
+    rows = rng.integers(0, 256, size=(count, size), dtype=np.uint8)
+    if length % 4:
+        rows[:, -1] &= np.uint8((0xFF << (2 * (4 - length % 4))) & 0xFF)  # padding packs as A
+    return [PackedSequence(length, row) for row in rows]
+
+def random_sequences(count, length, seed=None):
+    rng = np.random.default_rng(seed)
+    letters = _LETTERS[rng.integers(0, 4, size=(count, length), dtype=np.uint8)]
+    return [row.tobytes().decode("ascii") for row in letters]
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+
+from blockchain import decrypt_blocks
+
+# ==== Decrypted Payload Cache ====
+# Decrypted genetic data keyed by (block digest, grant). Keying by digest
+# means an edited block can never be served its old plaintext; the store
+# also reports digests that stop existing (LedgerStore.subscribe) so their
+# entries are dropped instead of waiting to be evicted.
+#
+# Each grant (the admin session, a generated access key) has a lifetime. Its
+# entries expire with it, and revoking a grant drops them at once. The cache
+# is bounded by the size of the cached text and evicts least recently used
+# entries first.
+
+FAILED = "[Decryption Failed]"
+ENTRY_OVERHEAD = 200  # rough per-entry bookkeeping, so tiny payloads still count
+
+
+class PayloadCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (digest, grant) -> plaintext, least recently used first
+        self._grants = {}              # grant -> monotonic expiry time, or None
+        self._by_digest = {}           # digest -> grants holding an entry for it
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ---- Grants ----
+    def grant(self, grant, ttl=None):
+        # (Re)start a grant's lifetime; ttl None means it never expires
+        with self._lock:
+            self._grants[grant] = time.monotonic() + ttl if ttl is not None else None
+
+    def revoke(self, grant):
+        with self._lock:
+            self._grants.pop(grant, None)
+            self._drop_grant(grant)
+
+    def is_active(self, grant):
+        with self._lock:
+            return self._active(grant, time.monotonic())
+
+    def _active(self, grant, now):
+        if grant not in self._grants:
+            return False
+        expires = self._grants[grant]
+        if expires is not None and now >= expires:
+            del self._grants[grant]
+            self.expirations += self._drop_grant(grant)
+            return False
+        return True
+
+    def purge_expired(self):
+        with self._lock:
+            now = time.monotonic()
+            for grant in list(self._grants):
+                self._active(grant, now)
+
+    # ---- Entries ----
+    def _drop(self, key):
+        text = self._entries.pop(key)
+        self.size -= len(text) + ENTRY_OVERHEAD
+        digest, grant = key
+        grants = self._by_digest[digest]
+        grants.discard(grant)
+        if not grants:
+            del self._by_digest[digest]
+
+    def _drop_grant(self, grant):
+        keys = [key for key in self._entries if key[1] == grant]
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def _store(self, key, text):
+        if key in self._entries:
+            self._drop(key)
+        cost = len(text) + ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        while self.size + cost > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = text
+        self.size += cost
+        self._by_digest.setdefault(key[0], set()).add(key[1])
+
+    def invalidate(self, digest):
+        # Every grant's entry for a block digest that no longer exists
+        with self._lock:
+            for grant in list(self._by_digest.get(digest, ())):
+                self._drop((digest, grant))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_digest.clear()
+            self.size = 0
+
+    # ---- Decryption ----
+    def decrypt_blocks(self, blocks, grant, workers=None):
+        # Same result as blockchain.decrypt_blocks; only the misses are decrypted
+        with self._lock:
+            if not self._active(grant, time.monotonic()):
+                raise PermissionError(f"grant {grant!r} is not active")
+            results = [None] * len(blocks)
+            missing = []
+            for position, block in enumerate(blocks):
+                key = (block.digest, grant)
+                text = self._entries.get(key)
+                if text is None:
+                    missing.append(position)
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    results[position] = text
+                    self.hits += 1
+
+        if missing:
+            decrypted = decrypt_blocks([blocks[position] for position in missing], workers)
+            with self._lock:
+                for position, text in zip(missing, decrypted):
+                    results[position] = text
+                    if text != FAILED and grant in self._grants:
+                        self._store((blocks[position].digest, grant), text)
+        return results
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,98 @@
+import copy
+
+# ==== Copy-on-Write Replica ====
+# A replica reads through to the canonical chain and only keeps a private
+# copy of a block once that block is edited on this server. The set of
+# privately owned heights doubles as the replica's divergence set.
+
+
+def digest_at(chain, index):
+    # Block hash at `index` of a list, BlockTable or Replica; the latter two
+    # read it without building the block
+    try:
+        return chain.digest_at(index)
+    except AttributeError:
+        return chain[index].digest
+
+
+class Replica:
+    def __init__(self, base):
+        self.base = base
+        self._owned = {}
+        self._length = None  # set once blocks were deleted on this server
+
+    def __len__(self):
+        return len(self.base) if self._length is None else min(self._length, len(self.base))
+
+    def _normalize(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("replica index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._normalize(index)
+        block = self._owned.get(index)
+        return block if block is not None else self.base[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def digest_at(self, index):
+        # The base bounds-checks heights it doesn't hold, so only negative or
+        # deleted heights need normalizing here
+        if index < 0 or (self._length is not None and index >= self._length):
+            index = self._normalize(index)
+        block = self._owned.get(index)
+        if block is not None:
+            return block.digest
+        return digest_at(self.base, index)
+
+    def own(self, index):
+        # Hand out a private, mutable copy of the block at `index`.
+        index = self._normalize(index)
+        block = self._owned.get(index)
+        if block is None:
+            block = copy.copy(self.base[index])
+            self._owned[index] = block
+        return block
+
+    def put(self, index, block):
+        self._owned[self._normalize(index)] = block
+
+    def truncate(self, length):
+        # Forget the blocks from `length` on; reset() brings them back.
+        self._length = length
+        for index in [i for i in self._owned if i >= length]:
+            del self._owned[index]
+
+    def reset(self, index=None):
+        # Drop private copies (all of them, or one height) and share again.
+        if index is None:
+            self._owned.clear()
+            self._length = None
+        else:
+            self._owned.pop(self._normalize(index), None)
+
+    def snapshot(self):
+        # Frozen view: later edits, deletes and appends to the base don't show
+        view = Replica(self.base)
+        view._owned = {index: copy.copy(block) for index, block in self._owned.items()}
+        view._length = len(self)
+        return view
+
+    def divergent(self):
+        # Owned heights, then the heights this server no longer holds at all
+        return sorted(self._owned) + list(range(len(self), len(self.base)))
+
+    def is_divergent(self, index):
+        return self._normalize(index) in self._owned
+
+
+def make_replicas(base, labels):
+    return {label: Replica(base) for label in labels}
@@ -0,0 +1,104 @@
+import struct
+
+# ==== Canonical Block Encoding ====
+# Every variable-length field is length-prefixed and dict entries are sorted
+# by key, so the bytes depend only on the block's contents (not on dict
+# insertion order) and adjacent fields can never run into each other the way
+# f"{index}{timestamp}..." does. The same bytes are hashed, written to disk
+# and shipped between replicas.
+
+FORMAT_VERSION = 1
+GENESIS_PREV_HASH = "0"
+DIGEST_SIZE = 32
+GENESIS_DIGEST = bytes(DIGEST_SIZE)
+PACKED_SEQUENCE_MAGIC = b"\x00NT3"  # see nucleotides.py
+
+_U32 = struct.Struct("<I")
+_HEADER = struct.Struct("<BQ")  # version, index
+
+
+def pack_bytes(data):
+    return _U32.pack(len(data)) + data
+
+def pack_str(value):
+    return pack_bytes(str(value).encode("utf-8"))
+
+def unpack_bytes(data, offset):
+    # (bytes, offset after them) for a pack_bytes() value at `offset`
+    start = offset + _U32.size
+    end = start + _U32.unpack_from(data, offset)[0]
+    if end > len(data):
+        raise ValueError("truncated block encoding")
+    return bytes(data[start:end]), end
+
+
+def encode_digest(hex_hash):
+    # The genesis block links to "0" rather than a real digest
+    if hex_hash == GENESIS_PREV_HASH:
+        return GENESIS_DIGEST
+    return bytes.fromhex(hex_hash)
+
+def decode_digest(digest):
+    if digest == GENESIS_DIGEST:
+        return GENESIS_PREV_HASH
+    return digest.hex()
+
+
+def encode_header(index, timestamp, merkle_root, previous_hash):
+    # What the block hash is taken over: the Merkle root stands in for the fields
+    return encode_raw_header(index, timestamp, merkle_root, encode_digest(previous_hash))
+
+def encode_raw_header(index, timestamp, merkle_root, previous_digest):
+    return b"".join([
+        _HEADER.pack(FORMAT_VERSION, index),
+        pack_str(timestamp),
+        merkle_root,
+        previous_digest,
+    ])
+
+def encode_fields(metadata, genetic_data, field_hashes, field_salt):
+    parts = [_U32.pack(len(metadata))]
+    for key, value in sorted(metadata.items()):
+        parts.append(pack_str(key))
+        parts.append(pack_str(value))
+    # The cipher tokens may come as their ASCII bytes (see Block.field_bytes)
+    parts.append(pack_bytes(genetic_data) if isinstance(genetic_data, bytes) else pack_str(genetic_data))
+    parts.append(_U32.pack(len(field_hashes)))
+    for name, digest in sorted(field_hashes.items()):
+        parts.append(pack_str(name))
+        parts.append(bytes.fromhex(digest))
+    parts.append(pack_bytes(field_salt) if isinstance(field_salt, bytes) else pack_str(field_salt))
+    return b"".join(parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size):
+        chunk = bytes(self.data[self.offset:self.offset + size])
+        if len(chunk) != size:
+            raise ValueError("truncated block encoding")
+        self.offset += size
+        return chunk
+
+    def u32(self):
+        return _U32.unpack(self.take(_U32.size))[0]
+
+    def str(self):
+        return self.take(self.u32()).decode("utf-8")
+
+def decode_fields(data):
+    reader = _Reader(data)
+    metadata = {}
+    for _ in range(reader.u32()):
+        key = reader.str()
+        metadata[key] = reader.str()
+    genetic_data = reader.str()
+    field_hashes = {}
+    for _ in range(reader.u32()):
+        name = reader.str()
+        field_hashes[name] = reader.take(DIGEST_SIZE).hex()
+    field_salt = reader.str()
+    return metadata, genetic_data, field_hashes, field_salt
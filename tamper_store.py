@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# ==== Durable Tamper Event Store ====
+# Append-only SQLite table in WAL mode: writers append in batches inside one
+# transaction, readers never block them, and the (server, time), (block, time)
+# and (time) indexes answer per-server, per-block and time-range queries
+# without loading the whole history.
+#
+# Several apps (and every rebuild of an app's in-memory ledger) can share one
+# database: a log opened with `ledger=` tags what it records with that name
+# and only reads back events with the same tag.
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_PATH = os.environ.get("GENEBLOCK_TAMPER_DB", "tamper_log.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tamper_events (
+    id     INTEGER PRIMARY KEY,
+    ledger TEXT    NOT NULL DEFAULT '',
+    time   REAL    NOT NULL,
+    server TEXT    NOT NULL,
+    block  INTEGER NOT NULL,
+    fields TEXT    NOT NULL DEFAULT '',
+    note   TEXT    NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS tamper_by_server ON tamper_events (server, time);
+CREATE INDEX IF NOT EXISTS tamper_by_block  ON tamper_events (block, time);
+CREATE INDEX IF NOT EXISTS tamper_by_time   ON tamper_events (time);
+"""
+
+
+def _to_epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.strptime(value, TIME_FORMAT)
+    return value.timestamp()
+
+
+class TamperLog:
+    def __init__(self, path=DEFAULT_PATH, batch_size=1000, ledger=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.ledger = ledger  # None reads every ledger's events
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tamper_events)")]
+        if "ledger" not in columns:  # database from before ledgers were tagged
+            self._conn.execute("ALTER TABLE tamper_events ADD COLUMN ledger TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tamper_by_ledger ON tamper_events (ledger, server, time)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- Writing ----
+    def record(self, server, block, note="", fields="", when=None, flush=False):
+        with self._lock:
+            self._buffer.append((self.ledger or "", when if when is not None else time.time(), server, block,
+                                 fields, note))
+            if flush or len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def record_many(self, events):
+        # events: iterables of (server, block, note, fields, when)
+        with self._lock:
+            for server, block, note, fields, when in events:
+                self._buffer.append((self.ledger or "", when if when is not None else time.time(), server, block,
+                                     fields, note))
+                if len(self._buffer) >= self.batch_size:
+                    self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO tamper_events (ledger, time, server, block, fields, note) VALUES (?, ?, ?, ?, ?, ?)",
+                self._buffer,
+            )
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    # ---- Querying ----
+    def _where(self, server, block, start, end):
+        clauses, params = [], []
+        for clause, value in (("ledger = ?", self.ledger), ("server = ?", server), ("block = ?", block),
+                              ("time >= ?", _to_epoch(start)), ("time <= ?", _to_epoch(end))):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_events(self, server=None, block=None, start=None, end=None, limit=None, newest_first=True):
+        # Rows shaped like the apps' tamper-log dicts, streamed from the cursor
+        self.flush()
+        where, params = self._where(server, block, start, end)
+        sql = "SELECT time, server, block, fields, note FROM tamper_events" + where
+        sql += " ORDER BY time DESC, id DESC" if newest_first else " ORDER BY time, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(500)
+            if not rows:
+                return
+            for row in rows:
+                yield self._as_dict(row)
+
+    def query(self, server=None, block=None, start=None, end=None, limit=None, newest_first=True):
+        return list(self.iter_events(server, block, start, end, limit, newest_first))
+
+    def count(self, server=None, block=None, start=None, end=None):
+        self.flush()
+        where, params = self._where(server, block, start, end)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tamper_events" + where, params).fetchone()[0]
+
+    @staticmethod
+    def _as_dict(row):
+        when, server, block, fields, note = row
+        return {
+            "Server": server,
+            "Block": block,
+            "Fields": fields,
+            "Time": datetime.fromtimestamp(when).strftime(TIME_FORMAT),
+            "Note": note,
+        }
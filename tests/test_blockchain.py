@@ -0,0 +1,24 @@
+import copy
+
+from test_checkpoints import RECORDS
+
+from blockchain import Block, BlockTable, build_chain
+
+
+def test_block_table_round_trips_blocks():
+    chain = build_chain(RECORDS, "2023-08-01 00:00:00")
+    blocks = [copy.copy(block) for block in chain]
+    odd = Block.from_stored(len(blocks), "2023-08-02 00:00:00", {"Patient ID": 7}, "not base64!", blocks[-1].hash,
+                            None, {}, "")
+    odd.digest = odd.calculate_digest()
+    blocks.append(odd)
+
+    table = BlockTable(blocks)
+    assert len(table) == len(blocks)
+    for i, block in enumerate(blocks):
+        assert table.digest_at(i) == block.digest
+        assert table[i].calculate_digest() == block.digest
+        assert table[i].field_bytes() == block.field_bytes()
+        assert dict(table[i].metadata) == dict(block.metadata)
+    assert table[-1].metadata["Patient ID"] == 7
+    assert [block.hash for block in table[2:4]] == [block.hash for block in blocks[2:4]]
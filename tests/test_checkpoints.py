@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import build_chain
+from ledger_store import LedgerStore
+
+RECORDS = [({"Patient ID": f"P{i}", "Sample Code": f"S{i}"}, {"SNP_ID": f"rs{i}"}) for i in range(8)]
+
+
+def make_store(length):
+    return LedgerStore(lambda: build_chain(RECORDS[:length], "2023-08-01 00:00:00"), ["A", "B", "C"])
+
+def append_next(store):
+    block = build_chain([RECORDS[len(store.chain)]], "2023-08-01 00:00:00", store.chain[-1].hash)[0]
+    block.index = len(store.chain)
+    block.digest = block.calculate_digest()
+    store.append(block)
+
+
+def test_edit_then_append_keeps_divergence():
+    store = make_store(3)
+    store.edit_metadata("A", 2, {"Patient ID": "X"})
+    assert store.first_divergence("A") == 2
+    for _ in range(5):
+        append_next(store)
+        assert store.first_divergence("A") == 2
+        assert store.first_divergence("B") is None
@@ -0,0 +1,17 @@
+from test_checkpoints import append_next, make_store
+
+
+def test_missing_block_never_wins_a_tie():
+    store = make_store(3)
+    store.delete_block("A", 2)
+    store.edit_metadata("B", 2, {"Patient ID": "X"})
+    # One missing, two different versions: no majority, every server is flagged
+    assert store.first_divergences() == {"A": 2, "B": 2, "C": 2}
+
+
+def test_short_replica_flagged_after_append():
+    store = make_store(3)
+    store.delete_block("A", 2)
+    assert store.first_divergences() == {"A": 2, "B": None, "C": None}
+    append_next(store)
+    assert store.first_divergences() == {"A": 2, "B": None, "C": None}
@@ -0,0 +1,99 @@
+# ==== Incremental Consensus Verification ====
+# Keeps the majority hash per block height and, for every replica, the height
+# and head hash it was last verified at. Each check only looks at blocks that
+# were appended or invalidated since the previous one.
+
+from replica import digest_at
+
+NO_MAJORITY = b""  # two or more block versions tied for the most votes
+
+
+class ChainVerifier:
+    def __init__(self, servers):
+        self.servers = servers
+        self._majority = []      # majority hash for heights [0, len)
+        self._heads = {}         # label -> (verified height, head hash)
+        self._first_bad = {}     # label -> first height that disagrees, or None
+
+    def majority_digest(self, index):
+        # A server without a block at `index` votes None, so a majority of
+        # servers that lost a block (or never had it) wins over a lone one,
+        # but None never wins a tie. A tie between block versions is
+        # NO_MAJORITY, which no server matches.
+        counts = {}
+        for chain in self.servers.values():
+            try:
+                digest = digest_at(chain, index)
+            except IndexError:
+                digest = None
+            counts[digest] = counts.get(digest, 0) + 1
+        most = max(counts.values())
+        leaders = [digest for digest, count in counts.items() if count == most]
+        if len(leaders) == 1:
+            return leaders[0]
+        blocks = [digest for digest in leaders if digest is not None]
+        return blocks[0] if len(blocks) == 1 else NO_MAJORITY
+
+    def majority_hash(self, index):
+        digest = self.majority_digest(index)
+        return digest.hex() if digest else None
+
+    def invalidate(self, index=0):
+        # An edit at `index` can move the majority at that height, so every
+        # replica forgets what it verified from there onward.
+        del self._majority[index:]
+        for label, (height, _) in list(self._heads.items()):
+            if height > index:
+                chain = self.servers[label]
+                head = digest_at(chain, index - 1) if index > 0 else None
+                self._heads[label] = (index, head)
+            first_bad = self._first_bad.get(label)
+            if first_bad is not None and first_bad >= index:
+                self._first_bad[label] = None
+
+    def _sync(self):
+        # Replicas changed behind our back (no invalidate call) start over.
+        for label, chain in self.servers.items():
+            height, head = self._heads.get(label, (0, None))
+            if height > len(chain) or (height and digest_at(chain, height - 1) != head):
+                self.invalidate(0)
+                break
+
+        # Heights some replica has not been checked at yet need a fresh majority.
+        start = min(
+            (self._heads.get(label, (0, None))[0] for label in self.servers),
+            default=0,
+        )
+        if start < len(self._majority):
+            self.invalidate(start)
+
+        top = max((len(chain) for chain in self.servers.values()), default=0)
+        for i in range(len(self._majority), top):
+            self._majority.append(self.majority_digest(i))
+
+        for label, chain in self.servers.items():
+            height, _ = self._heads.get(label, (0, None))
+            first_bad = self._first_bad.get(label)
+            if first_bad is None:
+                for i in range(height, len(chain)):
+                    if digest_at(chain, i) != self._majority[i]:
+                        first_bad = i
+                        break
+                else:
+                    # Shorter than the majority chain: the first height past its
+                    # end where the majority holds a block
+                    first_bad = next((i for i in range(len(chain), len(self._majority))
+                                      if self._majority[i] is not None), None)
+            self._first_bad[label] = first_bad
+            self._heads[label] = (len(chain), digest_at(chain, -1) if len(chain) else None)
+
+    def first_divergence(self, label):
+        self._sync()
+        return self._first_bad[label]
+
+    def is_chain_valid(self, label):
+        return self.first_divergence(label) is None
+
+    def majority(self):
+        self._sync()
+        return [digest.hex() for digest in self._majority if digest]